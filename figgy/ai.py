@@ -0,0 +1,257 @@
+"""
+A computer player that searches the placements of the falling piece
+
+Every final placement of the falling piece that can be reached by rotating it
+at its current position, shifting it sideways and dropping it, is enumerated
+and scored with a pluggable heuristic. The best placement is then played
+through the same actions a human player has, i.e. `rotate`, `move_left`,
+`move_right` and `drop` of an `figgy.game_logic.Engine` or a
+`figgy.simulation.Simulation`.
+"""
+import copy
+from collections import namedtuple
+
+from figgy.board import SurfaceProfile
+from figgy.simulation import Piece
+
+Placement = namedtuple("Placement", ["rotations", "shift", "cells", "game_over"])
+Placement.__doc__ = """ A reachable final position of a piece
+
+rotations is the number of quarter turns and shift the number of columns to
+move, negative to the left, before the piece is dropped to its cells. If
+game_over is True, dropping the piece there ends the game.
+"""
+
+
+def placements(board, piece):
+    """
+    Enumerate all distinct final placements of a piece
+
+    Parameters
+    ----------
+    board: figgy.board.Board or figgy.board.BitBoard
+        the fixed blocks
+    piece: figgy.simulation.Piece
+        the falling piece, it is not moved
+
+    Returns
+    -------
+    list of Placement:
+        the placements, each final set of cells only once
+    """
+    found = {}
+    rotated = copy.copy(piece)
+    for rotations in range(1 if piece.symmetric else 4):
+        if rotations and not rotated.rotate(board):
+            break
+        for delta, move in ((-1, Piece.move_left), (+1, Piece.move_right)):
+            shifted = copy.copy(rotated)
+            shift = 0
+            while True:
+                distance = shifted.drop_distance(board)
+                cells = tuple(
+                    sorted((col, line + distance) for col, line in shifted.cells())
+                )
+                if cells not in found:
+                    game_over = not distance and not shifted.fallen
+                    found[cells] = Placement(rotations, shift, cells, game_over)
+                if not move(shifted, board):
+                    break
+                shift += delta
+    return list(found.values())
+
+
+def evaluate(board, cells):
+    """
+    Return the surface of the board and the cleared lines after a placement
+
+    Parameters
+    ----------
+    board: figgy.board.Board or figgy.board.BitBoard
+        the fixed blocks
+    cells: list of tuple of int
+        the final cells of the piece
+
+    Returns
+    -------
+    figgy.board.SurfaceProfile:
+        the heights and holes of the columns, after the lines are cleared
+    int:
+        the number of cleared lines
+    """
+    per_line = {}
+    for _, line in cells:
+        per_line[line] = per_line.get(line, 0) + 1
+    full = {
+        line
+        for line, count in per_line.items()
+        if board.row_count(line) + count == board.width
+    }
+    profile = board.profile(cells)
+    if full:
+        profile = _clear_lines(board, cells, profile, full)
+    return profile, len(full)
+
+
+def _clear_lines(board, cells, profile, full):
+    # Every column loses one block per full line, but the top of a column can
+    # fall by more than that when its highest block is in a full line and
+    # there are holes under it, as in `_SurfaceIndex._remove_from_surface`
+    added = set(cells)
+    heights = []
+    holes = []
+    for col, (height, col_holes) in enumerate(zip(profile.heights, profile.holes)):
+        count = height - col_holes - len(full)
+        top = board.height - height
+        while top < board.height and (
+            top in full or ((col, top) not in board and (col, top) not in added)
+        ):
+            top += 1
+        if top == board.height:
+            height = 0
+        else:
+            height = board.height - top - sum(1 for line in full if line > top)
+        heights.append(height)
+        holes.append(height - count)
+    return SurfaceProfile(tuple(heights), tuple(holes))
+
+
+def default_heuristic(profile, lines):
+    """
+    Score a board from its surface and the number of cleared lines
+
+    The weights are the ones of the well-known four-feature linear evaluator
+    of aggregate height, cleared lines, holes and bumpiness.
+
+    Parameters
+    ----------
+    profile: figgy.board.SurfaceProfile
+        the heights and holes of the columns
+    lines: int
+        the number of cleared lines
+
+    Returns
+    -------
+    float:
+        the score, higher is better
+    """
+    heights = profile.heights
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return (
+        -0.510066 * sum(heights)
+        + 0.760666 * lines
+        - 0.35663 * sum(profile.holes)
+        - 0.184483 * bumpiness
+    )
+
+
+class AIPlayer:
+    """
+    Plays a game by searching the placements of the falling piece
+
+    The best placements are cached, keyed on the Zobrist hash of the board and
+    the falling piece and on the next piece, so that repeated positions are
+    not searched again.
+
+    Parameters
+    ----------
+    heuristic: callable, optional
+        a function taking a `figgy.board.SurfaceProfile` and the number of
+        cleared lines, returning a score where higher is better
+    lookahead: bool, optional
+        if True, also search the placements of the next piece
+    cache_size: int, optional
+        the maximum number of cached positions, 0 disables the cache
+    """
+
+    def __init__(self, heuristic=default_heuristic, lookahead=True, cache_size=10000):
+        self.heuristic = heuristic
+        self.lookahead = lookahead
+        self.evaluated = 0
+        self.cache_hits = 0
+        self._cache = {}
+        self._cache_size = cache_size
+
+    def choose(self, sim):
+        """
+        Find the best placement of the falling piece of a game
+
+        Parameters
+        ----------
+        sim: figgy.simulation.Simulation
+            the game
+
+        Returns
+        -------
+        Placement:
+            the best placement
+        """
+        piece = sim.current
+        next_piece = sim.next_piece if self.lookahead else None
+        key = (sim.state_hash(), next_piece and next_piece[0])
+        best = self._cache.get(key)
+        if best is not None:
+            self.cache_hits += 1
+            return best
+
+        best_score = None
+        for placement in placements(sim.board, piece):
+            if placement.game_over:
+                score = (False, 0.0)
+            elif next_piece is None:
+                score = (True, self.heuristic(*evaluate(sim.board, placement.cells)))
+                self.evaluated += 1
+            else:
+                score = (True, self._lookahead_score(sim, placement, next_piece[0]))
+            if best_score is None or score > best_score:
+                best, best_score = placement, score
+
+        if self._cache_size:
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[key] = best
+        return best
+
+    def play(self, game):
+        """
+        Play the falling piece of a game to the best placement and drop it
+
+        Parameters
+        ----------
+        game: figgy.game_logic.Engine or figgy.simulation.Simulation
+            the game, it is played through its public actions
+        """
+        sim = getattr(game, "simulation", game)
+        placement = self.choose(sim)
+        for _ in range(placement.rotations):
+            game.rotate()
+        move = game.move_left if placement.shift < 0 else game.move_right
+        for _ in range(abs(placement.shift)):
+            move()
+        game.drop()
+
+    def _lookahead_score(self, sim, placement, next_template):
+        board = sim.board
+        after = type(board)(board.width, board.height)
+        after.restore(board.snapshot())
+        after.add(placement.cells, sim.current.image)
+        _, lines = evaluate(board, placement.cells)
+        after.remove_lines(
+            [line for _, line in placement.cells if after.is_line_full(line)]
+        )
+
+        piece = Piece(
+            sim.object_templates,
+            next_template,
+            sim.current.image,
+            sim.scene_width,
+            sim.scene_height,
+        )
+        best = float("-inf")
+        for next_placement in placements(after, piece):
+            if next_placement.game_over:
+                continue
+            profile, next_lines = evaluate(after, next_placement.cells)
+            self.evaluated += 1
+            best = max(best, self.heuristic(profile, lines + next_lines))
+        return best
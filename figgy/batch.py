@@ -0,0 +1,217 @@
+"""
+A vectorized engine that steps many headless games at once with NumPy
+
+The rules are the same as in `figgy.simulation.Simulation`, but the state of
+all games is kept in arrays, so that collision tests, locking, line detection
+and line clearing are done for the whole batch in one go.
+"""
+import numpy as np
+
+from figgy.simulation import (
+    DROP,
+    MOVE_LEFT,
+    MOVE_RIGHT,
+    ROTATE,
+    TICK,
+    Simulation,
+    spawn_position,
+)
+from figgy.templates import TemplateSet
+
+
+class BatchEngine:
+    """
+    A number of games played in lock-step, one action per game and step
+
+    The boards are stored as a boolean array of shape (N, height, width) and
+    the falling pieces as arrays of template index, rotation and anchor.
+
+    Parameters
+    ----------
+    object_templates: figgy.templates.TemplateSet or list
+        the object templates to choose the shape of the pieces from
+    n_games: int
+        the number of games in the batch
+    seed: int, optional
+        the seed of the random generator choosing the pieces
+    width: int, optional
+        the number of columns of the boards, by default `scene_width`
+    height: int, optional
+        the number of lines of the boards, by default `scene_height`
+    """
+
+    scene_height = Simulation.scene_height
+    scene_width = Simulation.scene_width
+    default_tick_interval = Simulation.default_tick_interval
+
+    def __init__(self, object_templates, n_games, seed=None, width=None, height=None):
+        self.scene_width = width or self.scene_width
+        self.scene_height = height or self.scene_height
+        self.spawn_position = spawn_position(self.scene_width)
+        if not isinstance(object_templates, TemplateSet):
+            object_templates = TemplateSet(object_templates)
+        # Shape (templates, rotations, blocks, 2)
+        self._offsets = np.array(object_templates.orientations, dtype=np.int64)
+        self._symmetric = np.array(object_templates.symmetric, dtype=bool)
+        self._rng = np.random.default_rng(seed)
+        self.n_games = n_games
+
+        shape = (n_games, self.scene_height, self.scene_width)
+        self.boards = np.zeros(shape, dtype=bool)
+        self.templates = np.zeros(n_games, dtype=np.int64)
+        self.rotations = np.zeros(n_games, dtype=np.int64)
+        self.anchors = np.zeros((n_games, 2), dtype=np.int64)
+        self.fallen = np.zeros(n_games, dtype=bool)
+        self.is_running = np.zeros(n_games, dtype=bool)
+        self.completed_lines = np.zeros(n_games, dtype=np.int64)
+        self.tick_intervals = np.full(n_games, self.default_tick_interval)
+
+    def cells(self, games=None):
+        """
+        Return the grid positions occupied by the falling pieces
+
+        Parameters
+        ----------
+        games: numpy.ndarray, optional
+            the indices of the games, by default all games
+
+        Returns
+        -------
+        numpy.ndarray:
+            an array of shape (len(games), blocks, 2) with columns and lines
+        """
+        if games is None:
+            games = np.arange(self.n_games)
+        offsets = self._offsets[self.templates[games], self.rotations[games]]
+        return self.anchors[games, None, :] + offsets
+
+    def start_game(self, games=None):
+        """
+        Starts a new game in a number of slots of the batch
+
+        Parameters
+        ----------
+        games: numpy.ndarray, optional
+            the indices of the games, by default all games
+        """
+        if games is None:
+            games = np.arange(self.n_games)
+        self.boards[games] = False
+        self.is_running[games] = True
+        self.completed_lines[games] = 0
+        self.tick_intervals[games] = self.default_tick_interval
+        self._new_pieces(games)
+
+    def step(self, actions):
+        """
+        Apply one action to every running game
+
+        Parameters
+        ----------
+        actions: numpy.ndarray
+            one of TICK, MOVE_LEFT, MOVE_RIGHT, ROTATE or DROP for each game
+
+        Returns
+        -------
+        numpy.ndarray:
+            a boolean array, True for the games where a piece was locked
+        """
+        actions = np.asarray(actions)
+        locked = np.zeros(self.n_games, dtype=bool)
+        running = self.is_running
+
+        for action, delta in ((MOVE_LEFT, -1), (MOVE_RIGHT, +1)):
+            games = np.flatnonzero(running & (actions == action))
+            games = games[self.cells(games)[:, :, 1].min(axis=1) >= 0]
+            games = games[self._fits(games, dx=delta)]
+            self.anchors[games, 0] += delta
+
+        games = np.flatnonzero(
+            running & (actions == ROTATE) & ~self._symmetric[self.templates]
+        )
+        games = games[self._fits(games, rotation=1)]
+        self.rotations[games] = (self.rotations[games] + 1) % 4
+
+        self._tick(np.flatnonzero(running & (actions == TICK)), locked)
+        dropping = np.flatnonzero(running & (actions == DROP))
+        if dropping.size:
+            distances = self._drop_distances(dropping)
+            self.anchors[dropping, 1] += distances
+            self.fallen[dropping] |= distances > 0
+            locked[dropping] = True
+            self._lock(dropping)
+        return locked
+
+    def _drop_distances(self, games):
+        # The first offset where a piece does not fit is its drop distance + 1
+        fits = np.stack(
+            [self._fits(games, dy=dy) for dy in range(1, self.scene_height + 1)],
+            axis=1,
+        )
+        return np.argmin(fits, axis=1)
+
+    def _fits(self, games, dx=0, dy=0, rotation=0):
+        rotations = (self.rotations[games] + rotation) % 4
+        offsets = self._offsets[self.templates[games], rotations]
+        cols = self.anchors[games, 0, None] + dx + offsets[:, :, 0]
+        lines = self.anchors[games, 1, None] + dy + offsets[:, :, 1]
+        inside = (
+            (cols >= 0)
+            & (cols < self.scene_width)
+            & (lines >= 0)
+            & (lines < self.scene_height)
+        )
+        filled = self.boards[
+            games[:, None],
+            np.clip(lines, 0, self.scene_height - 1),
+            np.clip(cols, 0, self.scene_width - 1),
+        ]
+        return np.all(inside & ~filled, axis=1)
+
+    def _lock(self, games):
+        over = games[~self.fallen[games]]  # Stop game
+        self.is_running[over] = False
+        games = games[self.fallen[games]]
+        if not games.size:
+            return
+
+        cells = self.cells(games)
+        self.boards[games[:, None], cells[:, :, 1], cells[:, :, 0]] = True
+
+        boards = self.boards[games]
+        full = boards.all(axis=2)
+        nlines = full.sum(axis=1)
+        if nlines.any():
+            # Full lines are sorted to the top and cleared, the remaining lines
+            # keep their order at the bottom of the board
+            order = np.argsort(~full, axis=1, kind="stable")
+            boards = np.take_along_axis(boards, order[:, :, None], axis=1)
+            boards[np.arange(self.scene_height)[None, :] < nlines[:, None]] = False
+            self.boards[games] = boards
+
+            previous = self.completed_lines[games]
+            self.completed_lines[games] += nlines
+            speedups = self.completed_lines[games] // 4 - previous // 4
+            intervals = self.tick_intervals[games]
+            for count in range(speedups.max()):
+                faster = np.maximum(0.02, intervals - 0.1)
+                intervals = np.where(speedups > count, faster, intervals)
+            self.tick_intervals[games] = intervals
+
+        self._new_pieces(games)
+
+    def _new_pieces(self, games):
+        self.templates[games] = self._rng.integers(len(self._offsets), size=games.size)
+        self.rotations[games] = 0
+        self.anchors[games] = self.spawn_position
+        self.fallen[games] = False
+
+    def _tick(self, games, locked):
+        can_fall = self._fits(games, dy=1)
+        falling = games[can_fall]
+        self.anchors[falling, 1] += 1
+        self.fallen[falling] = True
+
+        failed = games[~can_fall]
+        locked[failed] = True
+        self._lock(failed)
@@ -0,0 +1,564 @@
+from array import array
+from collections import namedtuple
+
+from figgy.zobrist import cell_keys
+
+SurfaceProfile = namedtuple("SurfaceProfile", ["heights", "holes"])
+
+
+class _SurfaceIndex:
+    """
+    The height and the number of holes of each column of a board
+
+    The height of a column is the number of lines from its highest block down
+    to the bottom of the board, and a hole is an empty cell below that block.
+    Both are updated when cells are added and when lines are removed, so that
+    the surface of the board can be read in O(width).
+    """
+
+    def bumpiness(self):
+        """
+        Return the sum of the height differences of neighbouring columns
+
+        Returns
+        -------
+        int:
+            the bumpiness of the surface
+        """
+        heights = self._heights
+        return sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+
+    def column_height(self, col):
+        """
+        Return the height of a column
+
+        Parameters
+        ----------
+        col: int
+            the index of the column
+
+        Returns
+        -------
+        int:
+            the number of lines from the highest block to the bottom, 0 if
+            the column is empty
+        """
+        return self._heights[col]
+
+    def column_heights(self):
+        """
+        Return the heights of all columns
+
+        Returns
+        -------
+        tuple of int:
+            the height of each column
+        """
+        return tuple(self._heights)
+
+    def column_holes(self):
+        """
+        Return the number of holes of all columns
+
+        Returns
+        -------
+        tuple of int:
+            the number of empty cells below the highest block of each column
+        """
+        return tuple(
+            height - count for height, count in zip(self._heights, self._column_counts)
+        )
+
+    def profile(self, cells=()):
+        """
+        Return the surface of the board with a number of cells added
+
+        The board is not changed and full lines are not removed, so that a
+        candidate placement can be scored in O(width).
+
+        Parameters
+        ----------
+        cells: list of tuple of int, optional
+            the grid positions of a candidate placement, they must be empty
+
+        Returns
+        -------
+        SurfaceProfile:
+            the heights and the number of holes of each column
+        """
+        heights = list(self._heights)
+        counts = list(self._column_counts)
+        for col, line in cells:
+            heights[col] = max(heights[col], self.height - line)
+            counts[col] += 1
+        holes = tuple(height - count for height, count in zip(heights, counts))
+        return SurfaceProfile(tuple(heights), holes)
+
+    def _add_to_surface(self, col, line):
+        # Called once for every cell that becomes filled
+        self._heights[col] = max(self._heights[col], self.height - line)
+        self._column_counts[col] += 1
+
+    def _remove_from_surface(self, removed):
+        # Called before the lines are removed from the board
+        removed_below = [0] * (self.height + 1)
+        for line in range(self.height - 1, -1, -1):
+            removed_below[line] = removed_below[line + 1] + (line in removed)
+        for col in range(self.width):
+            self._column_counts[col] -= sum((col, line) in self for line in removed)
+            top = self.height - self._heights[col]
+            while top < self.height and (top in removed or (col, top) not in self):
+                top += 1
+            if top == self.height:
+                self._heights[col] = 0
+            else:
+                self._heights[col] = self.height - top - removed_below[top + 1]
+
+    def _restore_index(self, state):
+        self.zobrist, heights, counts = state
+        self._heights = list(heights)
+        self._column_counts = list(counts)
+
+    def _snapshot_index(self):
+        # The hash and the surface, so that restoring does not rebuild them
+        return self.zobrist, tuple(self._heights), tuple(self._column_counts)
+
+    def _reset_surface(self, cells=()):
+        self._heights = [0] * self.width
+        self._column_counts = [0] * self.width
+        for col, line in cells:
+            self._add_to_surface(col, line)
+
+
+class Board(_SurfaceIndex):
+    """
+    The fixed blocks of a game, stored as a dictionary keyed by grid position
+
+    The board has no knowledge of pygame, each cell holds the name of the
+    image the block should be drawn with. The number of filled cells of each
+    line is counted, so checking if a line is full does not scan the line, and
+    the height and holes of each column are kept up to date, as well as the
+    Zobrist hash of the filled cells in `zobrist`.
+
+    Parameters
+    ----------
+    width: int
+        the number of columns of the board
+    height: int
+        the number of lines of the board
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._cells = {}
+        self._row_counts = [0] * height
+        self._keys = cell_keys(width, height)
+        self.zobrist = 0
+        self._reset_surface()
+
+    def __contains__(self, pos):
+        return pos in self._cells
+
+    def __len__(self):
+        return len(self._cells)
+
+    def add(self, cells, image):
+        """
+        Fix a number of cells on the board
+
+        Parameters
+        ----------
+        cells: list of tuple of int
+            the grid positions to fill
+        image: str
+            the name of the image of the blocks
+        """
+        for pos in cells:
+            if pos not in self._cells:
+                self._row_counts[pos[1]] += 1
+                self.zobrist ^= self._keys[pos[1]][pos[0]]
+                self._add_to_surface(*pos)
+            self._cells[pos] = image
+
+    def clear(self):
+        """ Remove all blocks from the board
+        """
+        self._cells = {}
+        self._row_counts = [0] * self.height
+        self.zobrist = 0
+        self._reset_surface()
+
+    def get(self, pos, default=None):
+        """
+        Return the image at a position
+
+        Parameters
+        ----------
+        pos: tuple of int
+            the grid position
+        default: object, optional
+            the value to return if the position is empty
+
+        Returns
+        -------
+        str:
+            the name of the image at the position
+        """
+        return self._cells.get(pos, default)
+
+    def is_line_full(self, line):
+        """
+        Check if all cells of a line are filled
+
+        Parameters
+        ----------
+        line: int
+            the index of the line
+
+        Returns
+        -------
+        bool:
+            True if the line is full
+        """
+        return self._row_counts[line] == self.width
+
+    def items(self):
+        """
+        Return the filled cells of the board
+
+        Returns
+        -------
+        iterable of tuple:
+            pairs of grid position and image name
+        """
+        return self._cells.items()
+
+    def restore(self, state):
+        """
+        Restore the board from a snapshot
+
+        Parameters
+        ----------
+        state: tuple
+            a snapshot created by `snapshot`
+        """
+        cells, row_counts, index = state
+        self._cells = dict(cells)
+        self._row_counts = list(row_counts)
+        self._restore_index(index)
+
+    def snapshot(self):
+        """
+        Return an immutable copy of the board
+
+        Returns
+        -------
+        tuple:
+            the filled cells as pairs of grid position and image name, the
+            number of filled cells of each line and the column index
+        """
+        return (
+            tuple(self._cells.items()),
+            tuple(self._row_counts),
+            self._snapshot_index(),
+        )
+
+    def remove_line(self, line_to_remove):
+        """
+        Remove a line and move every block above it one step down
+
+        Parameters
+        ----------
+        line_to_remove: int
+            the index of the line
+        """
+        self.remove_lines([line_to_remove])
+
+    def remove_lines(self, lines_to_remove):
+        """
+        Remove a number of lines and move the blocks above them down, in one pass
+
+        Parameters
+        ----------
+        lines_to_remove: list of int
+            the indices of the lines
+        """
+        removed = set(lines_to_remove)
+        if not removed:
+            return
+        self._remove_from_surface(removed)
+        shifts = [0] * self.height
+        shift = 0
+        for line in range(self.height - 1, -1, -1):
+            if line in removed:
+                shift += 1
+            shifts[line] = shift
+        keys = self._keys
+        cells = {}
+        for (col, line), image in self._cells.items():
+            if line in removed:
+                self.zobrist ^= keys[line][col]
+                continue
+            shift = shifts[line]
+            if shift:
+                self.zobrist ^= keys[line][col] ^ keys[line + shift][col]
+            cells[(col, line + shift)] = image
+        self._cells = cells
+        kept = [
+            count for line, count in enumerate(self._row_counts) if line not in removed
+        ]
+        self._row_counts = [0] * len(removed) + kept
+
+    def row_count(self, line):
+        """
+        Return the number of filled cells of a line
+
+        Parameters
+        ----------
+        line: int
+            the index of the line
+
+        Returns
+        -------
+        int:
+            the number of filled cells
+        """
+        return self._row_counts[line]
+
+
+class BitBoard(_SurfaceIndex):
+    """
+    The fixed blocks of a game, stored as one integer bitmask per line
+
+    Bit ``col`` of ``rows[line]`` is set if the cell is filled, so collision
+    checks are AND operations, a full line is a compare against the full mask
+    and removing a line is a slice shift of the list of lines. The images of
+    the blocks are kept as 16-bit indices into a palette of image names, in
+    a line-major side table. The height and holes of each column are kept up
+    to date, as well as the Zobrist hash of the filled cells in `zobrist`.
+
+    Parameters
+    ----------
+    width: int
+        the number of columns of the board
+    height: int
+        the number of lines of the board
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full_mask = (1 << width) - 1
+        self._keys = cell_keys(width, height)
+        self._palette = [None]  # Index 0 is an empty cell
+        self._palette_index = {}
+        self.clear()
+
+    def __contains__(self, pos):
+        col, line = pos
+        if not 0 <= line < self.height or not 0 <= col < self.width:
+            return False
+        return self.rows[line] & (1 << col) != 0
+
+    def __len__(self):
+        return sum(bin(row).count("1") for row in self.rows)
+
+    def add(self, cells, image):
+        """
+        Fix a number of cells on the board
+
+        Parameters
+        ----------
+        cells: list of tuple of int
+            the grid positions to fill
+        image: str
+            the name of the image of the blocks
+        """
+        color = self._palette_index.get(image)
+        if color is None:
+            color = self._palette_index[image] = len(self._palette)
+            self._palette.append(image)
+        for col, line in cells:
+            if not self.rows[line] & (1 << col):
+                self.rows[line] |= 1 << col
+                self.zobrist ^= self._keys[line][col]
+                self._add_to_surface(col, line)
+            self._colors[line * self.width + col] = color
+
+    def clear(self):
+        """ Remove all blocks from the board
+        """
+        self.rows = [0] * self.height
+        self._colors = array("H", bytes(2 * self.width * self.height))
+        self.zobrist = 0
+        self._reset_surface()
+
+    def get(self, pos, default=None):
+        """
+        Return the image at a position
+
+        Parameters
+        ----------
+        pos: tuple of int
+            the grid position
+        default: object, optional
+            the value to return if the position is empty
+
+        Returns
+        -------
+        str:
+            the name of the image at the position
+        """
+        if pos not in self:
+            return default
+        return self._palette[self._colors[pos[1] * self.width + pos[0]]]
+
+    def is_line_full(self, line):
+        """
+        Check if all cells of a line are filled
+
+        Parameters
+        ----------
+        line: int
+            the index of the line
+
+        Returns
+        -------
+        bool:
+            True if the line is full
+        """
+        return self.rows[line] == self.full_mask
+
+    def items(self):
+        """
+        Return the filled cells of the board
+
+        Returns
+        -------
+        iterable of tuple:
+            pairs of grid position and image name
+        """
+        for line, row in enumerate(self.rows):
+            if not row:
+                continue
+            offset = line * self.width
+            for col in range(self.width):
+                if row & (1 << col):
+                    yield (col, line), self._palette[self._colors[offset + col]]
+
+    def restore(self, state):
+        """
+        Restore the board from a snapshot
+
+        Parameters
+        ----------
+        state: tuple
+            a snapshot created by `snapshot`
+        """
+        rows, colors, palette, index = state
+        self.rows = list(rows)
+        self._colors = array("H")
+        self._colors.frombytes(colors)
+        if self._palette != list(palette):
+            self._palette = list(palette)
+            self._palette_index = {
+                image: idx for idx, image in enumerate(palette) if idx
+            }
+        self._restore_index(index)
+
+    def snapshot(self):
+        """
+        Return an immutable copy of the board
+
+        Returns
+        -------
+        tuple:
+            the line masks, the colour indices of the cells, the palette and the
+            column index
+        """
+        return (
+            tuple(self.rows),
+            self._colors.tobytes(),
+            tuple(self._palette),
+            self._snapshot_index(),
+        )
+
+    def remove_line(self, line_to_remove):
+        """
+        Remove a line and move every block above it one step down
+
+        Parameters
+        ----------
+        line_to_remove: int
+            the index of the line
+        """
+        self._remove_from_surface({line_to_remove})
+        self._remove_from_hash({line_to_remove})
+        self.rows[1 : line_to_remove + 1] = self.rows[:line_to_remove]
+        self.rows[0] = 0
+        width = self.width
+        self._colors[width : (line_to_remove + 1) * width] = self._colors[
+            : line_to_remove * width
+        ]
+        self._colors[:width] = array("H", bytes(2 * width))
+
+    def remove_lines(self, lines_to_remove):
+        """
+        Remove a number of lines and move the blocks above them down, in one pass
+
+        Parameters
+        ----------
+        lines_to_remove: list of int
+            the indices of the lines
+        """
+        removed = set(lines_to_remove)
+        if not removed:
+            return
+        self._remove_from_surface(removed)
+        self._remove_from_hash(removed)
+        kept = [line for line in range(self.height) if line not in removed]
+        self.rows = [0] * len(removed) + [self.rows[line] for line in kept]
+        width = self.width
+        colors = array("H", bytes(2 * len(removed) * width))
+        for line in kept:
+            colors += self._colors[line * width : (line + 1) * width]
+        self._colors = colors
+
+    def row_count(self, line):
+        """
+        Return the number of filled cells of a line
+
+        Parameters
+        ----------
+        line: int
+            the index of the line
+
+        Returns
+        -------
+        int:
+            the number of filled cells
+        """
+        return bin(self.rows[line]).count("1")
+
+    def _remove_from_hash(self, removed):
+        # Called before the lines are removed, every line above a removed line
+        # moves down by the number of removed lines below it
+        shift = 0
+        for line in range(self.height - 1, -1, -1):
+            row = self.rows[line]
+            if line in removed:
+                shift += 1
+                self.zobrist ^= self._row_hash(line, row)
+            elif shift and row:
+                self.zobrist ^= self._row_hash(line, row)
+                self.zobrist ^= self._row_hash(line + shift, row)
+
+    def _row_hash(self, line, row):
+        keys = self._keys[line]
+        value = 0
+        while row:
+            low = row & -row
+            value ^= keys[low.bit_length() - 1]
+            row ^= low
+        return value
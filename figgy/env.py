@@ -0,0 +1,246 @@
+"""
+A reset/step environment interface for training agents on headless games
+
+The environment drives a `figgy.simulation.Simulation` directly, with a manual
+tick instead of a clock, and without a display. The observation is a single
+preallocated NumPy array that is updated in place on every step, so stepping
+does not allocate a new board.
+"""
+import random
+
+import numpy as np
+
+from figgy import resources
+from figgy.batch import BatchEngine
+from figgy.board import BitBoard
+from figgy.simulation import DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, TICK, Simulation
+
+EMPTY = 0
+FIXED = 1
+FALLING = 2
+
+
+class FiggyEnv:
+    """
+    A game with a reset/step interface
+
+    The actions are the codes of `figgy.simulation`, TICK lets the piece
+    fall one line and the other ones are the inputs of the player. The
+    observation is an array of shape (height, width), with FIXED for the
+    blocks on the board and FALLING for the falling piece. It is a read-only
+    view of a buffer that is reused by every step, copy it to keep it.
+
+    Parameters
+    ----------
+    object_templates: figgy.templates.TemplateSet, optional
+        the templates of the pieces, by default the ones in templates.json
+    images: list of str, optional
+        the images of the pieces, by default the shipped ones
+    board_class: type, optional
+        the board backend of the simulation
+    width: int, optional
+        the number of columns of the board
+    height: int, optional
+        the number of lines of the board
+    seed: int, optional
+        the seed of the first game
+    """
+
+    actions = (TICK, MOVE_LEFT, MOVE_RIGHT, ROTATE, DROP)
+
+    def __init__(
+        self,
+        object_templates=None,
+        images=None,
+        board_class=BitBoard,
+        width=None,
+        height=None,
+        seed=None,
+    ):
+        self.simulation = Simulation(
+            object_templates or resources.load_templates(),
+            images or resources.image_names(),
+            board_class,
+            rng=random.Random(seed),
+            width=width,
+            height=height,
+        )
+        sim = self.simulation
+        self._buffer = np.zeros((sim.scene_height, sim.scene_width), dtype=np.uint8)
+        self.observation = self._buffer.view()
+        self.observation.flags.writeable = False
+        self._piece_cells = []
+        self._info = {"lines": 0, "pieces": 0}
+        # Line masks are unpacked through a table of all masks, if it is small
+        self._unpacked = None
+        if hasattr(sim.board, "rows") and sim.scene_width <= 16:
+            masks = np.arange(1 << sim.scene_width)[:, None]
+            bits = (masks >> np.arange(sim.scene_width)) & 1
+            self._unpacked = (bits * FIXED).astype(np.uint8)
+
+    def reset(self, seed=None):
+        """
+        Start a new game
+
+        Parameters
+        ----------
+        seed: int, optional
+            if given, the pieces are chosen by a new random generator with this seed
+
+        Returns
+        -------
+        numpy.ndarray:
+            the observation
+        """
+        self.simulation.start_game(seed)
+        self._piece_cells = []
+        self._fill_board()
+        self._fill_piece(self.simulation.current.cells())
+        return self.observation
+
+    def step(self, action):
+        """
+        Apply an action and let the game advance
+
+        Parameters
+        ----------
+        action: int
+            one of the codes in `actions`
+
+        Returns
+        -------
+        numpy.ndarray:
+            the observation, the same array on every step
+        int:
+            the reward, the number of lines completed by the action
+        bool:
+            True if the game is over
+        dict:
+            the total number of completed lines and placed pieces, the same
+            dictionary on every step
+        """
+        sim = self.simulation
+        lines = sim.completed_lines
+        pieces = sim.pieces_placed
+        sim.apply(action)
+
+        cells = sim.current.cells()
+        if sim.pieces_placed != pieces:
+            self._fill_board()
+            self._fill_piece(cells)
+        elif cells != self._piece_cells:
+            buffer = self._buffer
+            board = sim.board
+            for pos in self._piece_cells:
+                # A piece spawned on a full board can overlap fixed blocks
+                buffer[pos[1], pos[0]] = FIXED if pos in board else EMPTY
+            self._fill_piece(cells)
+
+        self._info["lines"] = sim.completed_lines
+        self._info["pieces"] = sim.pieces_placed
+        return (
+            self.observation,
+            sim.completed_lines - lines,
+            not sim.is_running,
+            self._info,
+        )
+
+    def _fill_board(self):
+        board = self.simulation.board
+        if self._unpacked is not None:
+            np.take(self._unpacked, board.rows, axis=0, out=self._buffer)
+            return
+        self._buffer.fill(EMPTY)
+        for (col, line), _ in board.items():
+            self._buffer[line, col] = FIXED
+
+    def _fill_piece(self, cells):
+        buffer = self._buffer
+        for col, line in cells:
+            buffer[line, col] = FALLING
+        self._piece_cells = cells
+
+
+class FiggyBatchEnv:
+    """
+    A number of games with a vectorized reset/step interface
+
+    The games are played by a `figgy.batch.BatchEngine`, one action per game
+    and step. Games that are over are restarted on the next step. The
+    observation is an array of shape (n_envs, height, width), encoded as for
+    `FiggyEnv`, and is refilled in place on every step.
+
+    Parameters
+    ----------
+    n_envs: int
+        the number of games
+    object_templates: figgy.templates.TemplateSet, optional
+        the templates of the pieces, by default the ones in templates.json
+    width: int, optional
+        the number of columns of the boards
+    height: int, optional
+        the number of lines of the boards
+    seed: int, optional
+        the seed of the random generator choosing the pieces
+    """
+
+    actions = FiggyEnv.actions
+
+    def __init__(
+        self, n_envs, object_templates=None, width=None, height=None, seed=None
+    ):
+        self.engine = BatchEngine(
+            object_templates or resources.load_templates(), n_envs, seed, width, height
+        )
+        self._buffer = np.zeros(self.engine.boards.shape, dtype=np.uint8)
+        self.observation = self._buffer.view()
+        self.observation.flags.writeable = False
+        self._rewards = np.zeros(n_envs, dtype=np.int64)
+        self._games = np.arange(n_envs)
+
+    def reset(self):
+        """
+        Start new games in all slots
+
+        Returns
+        -------
+        numpy.ndarray:
+            the observation
+        """
+        self.engine.start_game()
+        self._fill()
+        return self.observation
+
+    def step(self, actions):
+        """
+        Apply one action to every game
+
+        Parameters
+        ----------
+        actions: numpy.ndarray
+            one of the codes in `actions` for each game
+
+        Returns
+        -------
+        numpy.ndarray:
+            the observation, the same array on every step
+        numpy.ndarray:
+            the number of lines completed by the action, for each game
+        numpy.ndarray:
+            True for the games that ended and will be restarted
+        """
+        engine = self.engine
+        over = np.flatnonzero(~engine.is_running)
+        if over.size:
+            engine.start_game(over)
+        np.copyto(self._rewards, engine.completed_lines)
+        engine.step(actions)
+        np.subtract(engine.completed_lines, self._rewards, out=self._rewards)
+        self._fill()
+        return self.observation, self._rewards, ~engine.is_running
+
+    def _fill(self):
+        engine = self.engine
+        np.copyto(self._buffer, engine.boards)
+        cells = engine.cells()
+        self._buffer[self._games[:, None], cells[:, :, 1], cells[:, :, 0]] = FALLING
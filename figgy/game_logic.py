@@ -1,17 +1,38 @@
-import glob
-import json
-import math
 import os
 import random
+import time
 
+import pygame
+from pgzero import game
 from pgzero.actor import Actor
 
+from figgy import resources
+from figgy.board import Board
+from figgy.randomizer import UniformSource
+from figgy.replay import PAUSE, ReplayLog
+from figgy.simulation import (
+    DROP,
+    MOVE_LEFT,
+    MOVE_RIGHT,
+    ROTATE,
+    TICK,
+    FallFailure,
+    Piece,
+    Simulation,
+    spawn_position,
+)
+from figgy.sprites import TileRenderer
+from figgy.stepper import FixedStepper
+from figgy.templates import TemplateSet
+
 
 class Block(Actor):
     """
     Class that represent a single block, a piece of a falling object or a fixed block
 
-    The block will be placed at the top of the scene
+    The block will be placed at the top of the scene. `Engine` does not draw
+    actors, it draws its tiles with `figgy.sprites.TileRenderer`; this class
+    is kept for compatibility, and `block_size` as the default tile size.
 
     Parameters
     ----------
@@ -19,12 +40,15 @@ class Block(Actor):
         the name of an image resource that will be loaded
     origin: dict int
         the origin of this block on which it will be rotated
+    anchor: tuple of int, optional
+        the grid position of the origin, by default the spawn position
     """
 
     block_size = 24
 
-    def __init__(self, image, origin):
-        pos = (origin["x"] + 6, origin["y"] + 1)
+    def __init__(self, image, origin, anchor=None):
+        anchor = anchor or spawn_position(Simulation.scene_width)
+        pos = (origin["x"] + anchor[0], origin["y"] + anchor[1])
         real_pos = pos[0] * self.block_size, pos[1] * self.block_size
         super().__init__(image, real_pos, (0, 0))
         self.grid_pos = pos
@@ -41,7 +65,18 @@ class Block(Actor):
         dy: int
             the delta in y
         """
-        self.grid_pos = (self.grid_pos[0] + dx, self.grid_pos[1] + dy)
+        self.place((self.grid_pos[0] + dx, self.grid_pos[1] + dy))
+
+    def place(self, grid_pos):
+        """
+        Place the block at a position on the scene. Repositions the image.
+
+        Parameters
+        ----------
+        grid_pos: tuple of int
+            the column and line of the block
+        """
+        self.grid_pos = grid_pos
         self.pos = (
             self.grid_pos[0] * self.block_size,
             self.grid_pos[1] * self.block_size,
@@ -49,15 +84,9 @@ class Block(Actor):
 
     def rotate(self):
         """
-        Rotates the block about a origin
+        Rotates the block a quarter turn about a origin
         """
-        angle = 0.5 * math.pi
-        tempx = round(
-            self.origin[0] * math.cos(angle) - self.origin[1] * math.sin(angle)
-        )
-        tempy = round(
-            self.origin[0] * math.sin(angle) + self.origin[1] * math.cos(angle)
-        )
+        tempx, tempy = -self.origin[1], self.origin[0]
         self.grid_pos = (
             tempx + (self.grid_pos[0] - self.origin[0]),
             tempy + (self.grid_pos[1] - self.origin[1]),
@@ -69,44 +98,57 @@ class Block(Actor):
         )
 
 
-class FallFailure(Exception):
-    """ A class to signal a failure to move a falling object downwards"""
-
-    pass
-
-
 class FallingObject:
     """
-    A collection of blocks that are falling
+    A collection of blocks that are falling, drawing a simulation piece
+
+    A compatibility shim for code that drew pieces as `Block` actors, `Engine`
+    does not use it. To draw many pieces, pass them as `piece` rather than
+    choosing them here, which builds the templates on every call.
 
     Parameters
     ----------
-    object_templates: list
+    object_templates: list or figgy.templates.TemplateSet
         a list of object templates to choose the shape of the object from
     images: list
         a list of images to choose the image for all blocks from
+    piece: figgy.simulation.Piece, optional
+        an existing piece to draw, then the templates and images are ignored
+    source: figgy.randomizer.PieceSource, optional
+        the source to take the template index and image from, by default
+        they are chosen uniformly at random
     """
 
-    def __init__(self, object_templates, images):
-        filename = random.choice(images)
-        name = os.path.splitext(filename)[0]
-
-        object_ = random.choice(object_templates)
-        self._symmetric = self._is_completely_symmetric(object_)
-        self._blocks = [Block(name, origo) for origo in object_]
-        self._hidden = False
-        self._fallen = False
+    def __init__(self, object_templates=None, images=None, piece=None, source=None):
+        if piece is None:
+            templates = object_templates
+            if not isinstance(templates, TemplateSet):
+                templates = TemplateSet(templates)
+            source = source or UniformSource(len(templates), images, chunk_size=1)
+            template, filename = source.pop()
+            name = os.path.splitext(os.path.basename(filename))[0]
+            piece = Piece(
+                templates,
+                template,
+                name,
+                Simulation.scene_width,
+                Simulation.scene_height,
+            )
+        self._piece = piece
+        self._blocks = [Block(piece.image, {"x": x, "y": y}) for x, y in piece.offsets]
 
     @property
     def fallen(self):
-        return self._fallen
+        return self._piece.fallen
+
+    @property
+    def piece(self):
+        return self._piece
 
     def draw(self):
         """ Draw all blocks on the scene
         """
-        if self._hidden:
-            return
-
+        self._sync_blocks()
         for block in self._blocks:
             block.draw()
 
@@ -124,12 +166,7 @@ class FallingObject:
         FallFailure
             if it is not possible to move downwards
         """
-        if self._can_fall(fixed_blocks):
-            for block in self._blocks:
-                block.move(0, 1)
-            self._fallen = True
-        else:
-            raise FallFailure
+        self._piece.move_down(fixed_blocks)
 
     def move_left(self, fixed_blocks):
         """
@@ -140,9 +177,7 @@ class FallingObject:
         fixed_blocks: dict
             a dictionary of fixed blocks
         """
-        if self._top_most() >= 0 and self._can_move_left(fixed_blocks):
-            for block in self._blocks:
-                block.move(-1, 0)
+        self._piece.move_left(fixed_blocks)
 
     def move_right(self, fixed_blocks):
         """
@@ -153,9 +188,7 @@ class FallingObject:
         fixed_blocks: dict
             a dictionary of fixed blocks
         """
-        if self._top_most() >= 0 and self._can_move_right(fixed_blocks):
-            for block in self._blocks:
-                block.move(+1, 0)
+        self._piece.move_right(fixed_blocks)
 
     def rotate(self, fixed_blocks):
         """
@@ -166,11 +199,7 @@ class FallingObject:
         fixed_blocks: dict
             a dictionary of fixed blocks
         """
-        if self._symmetric:  # Don't rotate the square box
-            return
-        if self._can_rotate(fixed_blocks):
-            for block in self._blocks:
-                block.rotate()
+        self._piece.rotate(fixed_blocks)
 
     def to_dict(self):
         """
@@ -181,210 +210,466 @@ class FallingObject:
         dict:
             the dictionary representation of this object
         """
+        self._sync_blocks()
         return {(block.grid_pos[0], block.grid_pos[1]): block for block in self._blocks}
 
-    def _bottom_most(self):
-        return max([block.grid_pos[1] for block in self._blocks])
-
-    def _can_fall(self, fixed_blocks):
-        for block in self._blocks:
-            query_pos = (block.grid_pos[0], block.grid_pos[1] + 1)
-            if (
-                block.grid_pos[1] == Engine.scene_height - 1
-                or query_pos in fixed_blocks
-            ):
-                return False
-        return True
-
-    def _can_move_left(self, fixed_blocks):
-        for block in self._blocks:
-            query_pos = (block.grid_pos[0] - 1, block.grid_pos[1])
-            if block.grid_pos[0] == 0 or query_pos in fixed_blocks:
-                return False
-        return True
-
-    def _can_move_right(self, fixed_blocks):
-        for block in self._blocks:
-            query_pos = (block.grid_pos[0] + 1, block.grid_pos[1])
-            if block.grid_pos[0] == Engine.scene_width - 1 or query_pos in fixed_blocks:
-                return False
-        return True
-
-    def _can_rotate(self, fixed_blocks):
-        self._hidden = True
-        for block in self._blocks:
-            block.rotate()
-        invalid = self._is_outside()
-        for block in self._blocks:
-            if block.grid_pos in fixed_blocks:
-                invalid = True
-                break
-        for _ in range(3):
-            for block in self._blocks:
-                block.rotate()
-        self._hidden = False
-        return not invalid
-
-    def _is_outside(self):
-        return (
-            self._left_most() < 0
-            or self._right_most() >= Engine.scene_width
-            or self._top_most() < 0
-            or self._bottom_most() >= Engine.scene_height
-        )
-
-    def _left_most(self):
-        return min([block.grid_pos[0] for block in self._blocks])
-
-    def _right_most(self):
-        return max([block.grid_pos[0] for block in self._blocks])
-
-    def _top_most(self):
-        return min([block.grid_pos[1] for block in self._blocks])
-
-    @staticmethod
-    def _is_completely_symmetric(template):
-        midx = sum(piece["x"] for piece in template) / float(len(template))
-        midy = sum(piece["y"] for piece in template) / float(len(template))
-        distances = [
-            (piece["x"] - midx) * (piece["x"] - midx)
-            + (piece["y"] - midy) * (piece["y"] - midy)
-            for piece in template
-        ]
-        return all(dist - distances[0] == 0 for dist in distances)
+    def _sync_blocks(self):
+        for block, offset, pos in zip(
+            self._blocks, self._piece.offsets, self._piece.cells()
+        ):
+            block.origin = offset
+            block.place(pos)
 
 
 class Engine:
     """
     Represents the game engine, the public API
 
+    The rules are implemented by a headless `figgy.simulation.Simulation`,
+    the engine schedules it on the clock and draws its state. Alternatively,
+    with a `timestep`, the inputs are queued and the logic is advanced by a
+    `figgy.stepper.FixedStepper` from `update`, and the clock is only used
+    for animations. The fixed blocks
+    are rendered into an off-screen layer, which is only repainted when a piece
+    is locked or lines are cleared. In dirty-rectangle mode, see `draw_dirty`,
+    only the cells that changed since the last frame are repainted.
+    Every game is recorded in `replay_log`, which can be re-simulated with a
+    `figgy.replay.ReplayEngine`.
+
     Parameters
     ----------
     clock: pgzero.clock.Clock
         the master clock
+    board_class: type, optional
+        the board backend of the simulation
+    rng: random.Random, optional
+        the random generator choosing the seed of each game
+    replay_path: str, optional
+        if given, the replay log is written to this file when a game ends
+    atlas: bool, optional
+        if True, draw the blocks from a single texture atlas
+    object_templates: figgy.templates.TemplateSet, optional
+        the templates of the pieces, by default the ones in templates.json
+    width: int, optional
+        the number of columns of the scene, by default `scene_width`
+    height: int, optional
+        the number of lines of the scene, by default `scene_height`
+    block_size: int, optional
+        the size of a block in pixels, by default `Block.block_size`
+    ghost: bool, optional
+        if True, show a translucent preview of where the falling object lands
+    animate_drop: bool, optional
+        if True, a dropped object slides down to its landing position
+    timestep: float, optional
+        if given, the duration in seconds of a fixed logic step, and the game
+        is advanced by `update` instead of on the clock
+    source: figgy.randomizer.PieceSource, optional
+        the sequence of pieces, by default uniformly random pieces
+    preview: int, optional
+        the number of upcoming pieces in `upcoming`
     """
 
-    scene_height = 25
-    scene_width = 12
-    default_tick_interval = 1.25
-
-    def __init__(self, clock):
-        self._current = None
-        self._blocks = {}
-        self.is_running = False
+    scene_height = Simulation.scene_height
+    scene_width = Simulation.scene_width
+    default_tick_interval = Simulation.default_tick_interval
+    background = (255, 255, 255)
+    drop_animation_time = 0.15
+    max_delay = 0.25
+
+    def __init__(
+        self,
+        clock,
+        board_class=Board,
+        rng=None,
+        replay_path=None,
+        atlas=False,
+        object_templates=None,
+        width=None,
+        height=None,
+        block_size=None,
+        ghost=False,
+        animate_drop=False,
+        timestep=None,
+        source=None,
+        preview=1,
+    ):
+        self.replay_log = None
+        self._replay_path = replay_path
+        self._game_start = 0.0
+        self._rng = rng or random.Random()
         self._is_pausing = False
-        self._is_dropping = False
         self._clock = clock
-        self._tick_interval = self.default_tick_interval
-        self._completed_lines = 0
+        self._ghost = ghost
+        self._animate_drop = animate_drop
+        self._drop_animation = None  # Image, cells, distance and start time
+        self._stepper = None
+        if timestep is not None:
+            self._stepper = FixedStepper(
+                self._apply,
+                lambda: self._sim.tick_interval,
+                timestep,
+                max_delay=self.max_delay,
+            )
+
+        images = resources.image_names()
+        self._sim = Simulation(
+            object_templates or resources.load_templates(),
+            images,
+            board_class,
+            width=width,
+            height=height,
+            source=source,
+            preview=preview,
+        )
+        self.scene_width = self._sim.scene_width
+        self.scene_height = self._sim.scene_height
+        self.block_size = block_size or Block.block_size
+        self._renderer = TileRenderer(self.block_size, images, atlas)
+        self._board_layer = None
+        self._board_layer_valid = False
+        self._drawn_cells = {}  # Grid position to drawing function and image
+        self._dirty_cells = set()
+        self._dirty_lines = None  # None means that the whole scene is dirty
 
-        figgy_path = os.path.dirname(os.path.abspath(__file__))
-        filename = os.path.join(figgy_path, "templates.json")
-        with open(filename, "r") as fileobj:
-            self._object_templates = json.load(fileobj)
+    @property
+    def is_running(self):
+        return self._sim.is_running
+
+    @property
+    def simulation(self):
+        return self._sim
 
-        self._images = glob.glob(os.path.join(figgy_path, "images", "*.png"))
+    @property
+    def stepper(self):
+        return self._stepper
+
+    @property
+    def upcoming(self):
+        """ The template indices and images of the pieces that come next
+        """
+        return self._sim.upcoming
 
     def draw(self):
-        """ Draw all blocks and falling objects on the scene
+        """ Draw the background, all blocks and falling objects on the scene
         """
         if not self.is_running:
             return
 
-        for _, block in self._blocks.items():
-            block.draw()
-        self._current.draw()
+        if self._drop_animation is not None:
+            self._draw_drop_animation()
+            return
+        if not self._board_layer_valid:
+            self._render_board_layer()
+        game.screen.blit(self._board_layer, (0, 0))
+        overlay = self._overlay()
+        self._draw_overlay(overlay, overlay)
+        self._drawn_cells = overlay
+        self._dirty_cells = set()
+        self._dirty_lines = []
+
+    def draw_dirty(self):
+        """
+        Repaint only the cells that changed since the last frame
+
+        Those are the cells left or entered by the falling object or its ghost,
+        the cells of locked objects and all lines above a cleared line. The
+        returned regions can be passed to `pygame.display.update`, so that
+        only they are sent to the display.
+
+        Returns
+        -------
+        list of pygame.Rect:
+            the regions of the screen that were repainted
+        """
+        if not self.is_running:
+            return []
+        if self._dirty_lines is None or self._drop_animation is not None:
+            self.draw()
+            return [game.screen.get_rect()]
+
+        if not self._board_layer_valid:
+            self._render_board_layer()
+        size = self.block_size
+        rects = []
+        top = -1
+        if self._dirty_lines:
+            top = max(self._dirty_lines)
+            rect = pygame.Rect(0, 0, self.scene_width * size, (top + 1) * size)
+            game.screen.blit(self._board_layer, rect, rect)
+            rects.append(rect)
+
+        overlay = self._overlay()
+        drawn = self._drawn_cells
+        changed = {
+            pos
+            for pos in drawn.keys() | overlay.keys()
+            if drawn.get(pos) != overlay.get(pos)
+        }
+        changed |= self._dirty_cells
+        # Each blit has a fixed cost about that of a few cells, so the changed
+        # cells are merged into one box per group of neighbouring lines
+        boxes = []
+        for col, line in sorted(changed, key=lambda pos: pos[1]):
+            if line <= top:
+                continue
+            if boxes and line <= boxes[-1][3] + 1:
+                left, first, right, _ = boxes[-1]
+                boxes[-1] = (min(left, col), first, max(right, col), line)
+            else:
+                boxes.append((col, line, col, line))
+        for left, first, right, last in boxes:
+            rect = pygame.Rect(
+                left * size,
+                first * size,
+                (right - left + 1) * size,
+                (last - first + 1) * size,
+            )
+            game.screen.blit(self._board_layer, rect, rect)
+            rects.append(rect)
+        self._draw_overlay(
+            overlay,
+            [
+                (col, line)
+                for col, line in overlay
+                if line <= top
+                or any(
+                    left <= col <= right and first <= line <= last
+                    for left, first, right, last in boxes
+                )
+            ],
+        )
+        self._drawn_cells = overlay
+        self._dirty_cells = set()
+        self._dirty_lines = []
+        return rects
+
+    def invalidate(self):
+        """ Mark the whole scene to be repainted on the next frame
+        """
+        self._dirty_lines = None
 
     def drop(self):
-        """ Drop the currently falling object
+        """ Drop the currently falling object to its landing position and lock it
         """
-        if not self.is_running or self._is_pausing:
-            return
-        self._is_dropping = True
-        self._clock.unschedule(self._tick)
-        self._clock.schedule_interval(self._tick, 0.01)
+        self._input(DROP)
 
     def move_left(self):
         """ Move the currently falling object to the left
         """
-        if not self.is_running or self._is_pausing or self._is_dropping:
-            return
-        self._current.move_left(self._blocks)
+        self._input(MOVE_LEFT)
 
     def move_right(self):
         """ Move the currently falling object to the right
         """
-        if not self.is_running or self._is_pausing or self._is_dropping:
-            return
-        self._current.move_right(self._blocks)
+        self._input(MOVE_RIGHT)
 
     def pause_game(self):
-        if not self.is_running or self._is_dropping:
-            return
+        self._input(PAUSE)
+
+    def restore(self, state):
+        """
+        Restore the game from a snapshot
+
+        The events recorded in `replay_log` are kept, so the log of a game
+        that was restored does not replay it anymore.
 
-        if self._is_pausing:
-            self._clock.schedule_interval(self._tick, self._tick_interval)
+        Parameters
+        ----------
+        state: figgy.simulation.SimulationState
+            a snapshot created by `snapshot`
+        """
+        self._stop_drop_animation()
+        self._sim.restore(state)
+        self._board_layer_valid = False
+        self._dirty_lines = None
+        if self._stepper is not None:
+            self._stepper.clear()
         else:
             self._clock.unschedule(self._tick)
-        self._is_pausing = not self._is_pausing
+            if self.is_running and not self._is_pausing:
+                self._clock.schedule_interval(self._tick, self._sim.tick_interval)
 
     def rotate(self):
         """ Rotate the currently falling object
         """
-        if not self.is_running or self._is_pausing or self._is_dropping:
-            return
-        self._current.rotate(self._blocks)
+        self._input(ROTATE)
+
+    def snapshot(self):
+        """
+        Return an immutable copy of the state of the game
+
+        The snapshot holds no references to the engine and can be pickled.
+
+        Returns
+        -------
+        figgy.simulation.SimulationState:
+            the board, the falling piece, the tick interval, the counters and
+            the state of the piece source
+        """
+        return self._sim.snapshot()
 
     def start_game(self):
         """ Starts a new game
         """
-        self._blocks = {}
-        self.is_running = True
+        self._stop_drop_animation()
         self._is_pausing = False
-        self._tick_interval = self.default_tick_interval
-        self._completed_lines = 0
-        self._new_falling_object()
-
-    def _check_lines(self):
-        for line in range(self.scene_height):
-            if all((col, line) in self._blocks for col in range(self.scene_width)):
-                self._remove_line(line)
-                self._completed_lines += 1
-                if self._completed_lines % 4 == 0:
-                    self._tick_interval = max(0.02, self._tick_interval - 0.1)
+        seed = self._rng.getrandbits(63)
+        self.replay_log = ReplayLog(seed, self.scene_width, self.scene_height)
+        self._game_start = time.perf_counter()
+        self._sim.start_game(seed)
+        self._board_layer_valid = False
+        self._dirty_lines = None
+        if self._stepper is not None:
+            self._stepper.reset()
+        else:
+            self._clock.unschedule(self._tick)
+            self._clock.schedule_interval(self._tick, self._sim.tick_interval)
+
+    def update(self, dt):
+        """
+        Advance the logic by elapsed time, in fixed-timestep mode
+
+        Parameters
+        ----------
+        dt: float
+            the time in seconds since the last update
+
+        Returns
+        -------
+        int:
+            the number of logic steps that were run
+        """
+        if self._stepper is None or not self.is_running:
+            return 0
+        return self._stepper.advance(dt)
+
+    def _accepts_input(self):
+        return self.is_running and not self._is_pausing and self._drop_animation is None
+
+    def _apply(self, code):
+        if code == TICK:
+            if self.is_running:
+                self._tick()
+        elif code == PAUSE:
+            self._pause()
+        elif self._accepts_input():
+            self._record(code)
+            if code == DROP:
+                self._drop()
+            elif code == MOVE_LEFT:
+                self._sim.move_left()
+            elif code == MOVE_RIGHT:
+                self._sim.move_right()
+            elif code == ROTATE:
+                self._sim.rotate()
+
+    def _animate(self):
+        start = self._drop_animation[3]
+        if time.perf_counter() - start >= self.drop_animation_time:
+            self._stop_drop_animation()
+            self.invalidate()
+
+    def _drop(self):
+        current = self._sim.current
+        image, cells = current.image, current.cells()
+        distance = self._sim.land()
+        self._handle_fall_failure()
+        if self._animate_drop and distance and self.is_running:
+            self._drop_animation = (image, cells, distance, time.perf_counter())
+            self._clock.schedule_interval(self._animate, 1.0 / 60)
+
+    def _draw_drop_animation(self):
+        # The board layer still shows the board before the dropped object was
+        # locked, it is only repainted when the animation is over
+        if self._board_layer is None:
+            self._render_board_layer()
+        game.screen.blit(self._board_layer, (0, 0))
+        image, cells, distance, start = self._drop_animation
+        progress = min(1.0, (time.perf_counter() - start) / self.drop_animation_time)
+        for col, line in cells:
+            self._renderer.draw(game.screen, image, (col, line + progress * distance))
+        self._dirty_lines = None
+
+    def _draw_overlay(self, overlay, positions):
+        for pos in positions:
+            draw, image = overlay[pos]
+            draw(game.screen, image, pos)
 
     def _handle_fall_failure(self):
-        self._is_dropping = False
-        self._clock.unschedule(self._tick)
-        if not self._current.fallen:  # Stop game
-            self.is_running = False
+        if self._stepper is not None:
+            self._stepper.reset_gravity()
+        else:
+            self._clock.unschedule(self._tick)
+        self._dirty_cells.update(self._sim.current.cells())
+        self._sim.lock()
+        self._board_layer_valid = False
+        if self._dirty_lines is not None:
+            self._dirty_lines.extend(self._sim.cleared_lines)
+        if not self.is_running:
+            if self._replay_path:
+                self.replay_log.save(self._replay_path)
+        elif self._stepper is None:
+            self._clock.schedule_interval(self._tick, self._sim.tick_interval)
+
+    def _input(self, code):
+        if self._stepper is not None:
+            self._stepper.push(code)
         else:
-            self._blocks.update(self._current.to_dict())
-            self._check_lines()
-            self._new_falling_object()
+            self._apply(code)
+
+    def _overlay(self):
+        current = self._sim.current
+        cells = current.cells()
+        overlay = {}
+        if self._ghost:
+            distance = current.drop_distance(self._sim.board)
+            ghost = (self._renderer.draw_ghost, current.image)
+            overlay.update(((col, line + distance), ghost) for col, line in cells)
+        piece = (self._renderer.draw, current.image)
+        overlay.update((pos, piece) for pos in cells)
+        return overlay
+
+    def _pause(self):
+        if not self.is_running or self._drop_animation is not None:
+            return
 
-    def _new_falling_object(self):
-        self._current = FallingObject(
-            object_templates=self._object_templates, images=self._images
-        )
-        self._clock.schedule_interval(self._tick, self._tick_interval)
-
-    def _remove_line(self, line_to_remove):
-        for col in range(self.scene_width):
-            del self._blocks[(col, line_to_remove)]
-
-        # Move every block above the removed line, one step down
-        for line in range(line_to_remove - 1, -1, -1):
-            for col in range(self.scene_width):
-                if (col, line) not in self._blocks:
-                    continue
-                block = self._blocks[(col, line)]
-                block.move(0, +1)
-                self._blocks[(col, line + 1)] = block
-                del self._blocks[(col, line)]
+        self._record(PAUSE)
+        self._is_pausing = not self._is_pausing
+        if self._stepper is not None:
+            self._stepper.paused = self._is_pausing
+        elif self._is_pausing:
+            self._clock.unschedule(self._tick)
+        else:
+            self._clock.schedule_interval(self._tick, self._sim.tick_interval)
+
+    def _record(self, code):
+        if self._stepper is not None:
+            # The logic time, so that the log does not depend on the frame rate
+            time_ms = int(self._stepper.time * 1000)
+        else:
+            time_ms = int((time.perf_counter() - self._game_start) * 1000)
+        self.replay_log.record(code, time_ms)
+
+    def _render_board_layer(self):
+        if self._board_layer is None:
+            size = (
+                self.scene_width * self.block_size,
+                self.scene_height * self.block_size,
+            )
+            self._board_layer = pygame.Surface(size).convert(game.screen)
+        self._board_layer.fill(self.background)
+        for pos, image in self._sim.board.items():
+            self._renderer.draw(self._board_layer, image, pos)
+        self._board_layer_valid = True
+
+    def _stop_drop_animation(self):
+        if self._drop_animation is not None:
+            self._clock.unschedule(self._animate)
+            self._drop_animation = None
 
     def _tick(self):
+        self._record(TICK)
         try:
-            self._current.move_down(self._blocks)
+            self._sim.current.move_down(self._sim.board)
         except FallFailure:
             self._handle_fall_failure()
@@ -1,16 +1,69 @@
-from figgy.game_logic import Engine, Block
+import atexit
+import os
+import time
+from collections import deque
+
+import pygame
+
+from figgy import profiling
+from figgy.game_logic import Block, Engine
+
+DIRTY_RECTS = bool(os.environ.get("FIGGY_DIRTY_RECTS"))
+SHOW_FRAME_TIME = bool(os.environ.get("FIGGY_FRAME_TIME"))
+PROFILE_PATH = os.environ.get("FIGGY_PROFILE")
+PROFILE_OVERLAY = bool(os.environ.get("FIGGY_PROFILE_OVERLAY"))
+FIXED_STEP = bool(os.environ.get("FIGGY_FIXED_STEP"))
 
 WIDTH = Block.block_size * Engine.scene_width
 HEIGHT = Block.block_size * Engine.scene_height
 TITLE = "Figgy"
 
-engine = Engine(clock)
+engine = None
+profiler = None
+
+frame_times = deque(maxlen=60)
+frame_start = None
+
+
+def get_engine():
+    """ Create the engine on first use, so that the window opens before the
+    templates and images are loaded
+    """
+    global engine, profiler
+
+    if engine is None:
+        engine = Engine(
+            clock,
+            replay_path=os.environ.get("FIGGY_REPLAY"),
+            atlas=bool(os.environ.get("FIGGY_ATLAS")),
+            ghost=bool(os.environ.get("FIGGY_GHOST")),
+            animate_drop=bool(os.environ.get("FIGGY_ANIMATE_DROP")),
+            timestep=1.0 / 60 if FIXED_STEP else None,
+        )
+        if PROFILE_PATH or PROFILE_OVERLAY:
+            profiler = profiling.instrument(engine)
+            if PROFILE_PATH:
+                atexit.register(profiler.dump, PROFILE_PATH)
+    return engine
 
 
 def draw():
-    screen.fill((255, 255, 255))
-    engine.draw()
-    if not engine.is_running:
+    """ Draw the frame, returning the regions of the screen that changed, or
+    None if the whole screen should be updated
+    """
+    global frame_start
+
+    frame_start = time.perf_counter()
+    engine = get_engine()
+    rects = None
+    if engine.is_running:
+        if DIRTY_RECTS:
+            rects = engine.draw_dirty()
+        else:
+            engine.draw()  # Repaints the background as well
+    else:
+        engine.invalidate()
+        screen.fill(Engine.background)
         screen.draw.text(
             "Press N key to start game!",
             centerx=0.5 * WIDTH,
@@ -19,8 +72,54 @@ def draw():
             color=(0, 200, 0),
         )
 
+    if profiler is not None:
+        profiler.record("frame", time.perf_counter() - frame_start)
+        if PROFILE_OVERLAY:
+            for idx, line in enumerate(profiler.overlay_lines()):
+                screen.draw.text(
+                    line, topleft=(4, 4 + 14 * idx), fontsize=16, color=(0, 0, 0)
+                )
+            engine.invalidate()  # The overlay is drawn over the scene
+            rects = None
+    return rects
+
+
+def present(rects):
+    """ Update the display, only the regions that changed if there are any
+
+    Called by `figgy.utils.runner` instead of flipping the whole display. The
+    frame time includes the drawing and the display update.
+    """
+    global TITLE
+
+    start = time.perf_counter()
+    if rects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(rects)
+    end = time.perf_counter()
+    if profiler is not None:
+        profiler.record("display", end - start)
+
+    if SHOW_FRAME_TIME and frame_start is not None:
+        frame_times.append(end - frame_start)
+        if len(frame_times) == frame_times.maxlen:
+            mean = 1000 * sum(frame_times) / len(frame_times)
+            mode = "dirty rects" if DIRTY_RECTS else "full redraw"
+            TITLE = f"Figgy - {mean:.3f} ms/frame ({mode})"
+            frame_times.clear()
+
+
+if FIXED_STEP:
+
+    def update(dt):
+        # Only defined in fixed-step mode, as pgzero redraws every frame when
+        # there is an update function
+        get_engine().update(dt)
+
 
 def on_key_down():
+    engine = get_engine()
     if keyboard.n:
         engine.start_game()
     elif keyboard.p:
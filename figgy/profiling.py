@@ -0,0 +1,200 @@
+"""
+Opt-in timing instrumentation of a running game
+
+A `Profiler` keeps the durations of the last calls of a number of named
+sections in ring buffers. `instrument` wraps the methods of an engine that run
+on every tick, lock, frame and key press, and measures how late the clock
+calls the tick compared to the tick interval. Nothing is wrapped unless the
+instrumentation is asked for, so an uninstrumented game pays no overhead.
+"""
+import functools
+import json
+import time
+from collections import deque
+
+
+class Profiler:
+    """
+    Ring buffers of the durations of named sections
+
+    Parameters
+    ----------
+    size: int, optional
+        the number of durations kept for each section
+    """
+
+    def __init__(self, size=600):
+        self.size = size
+        self._timings = {}
+
+    def record(self, name, seconds):
+        """
+        Add a duration to the buffer of a section
+
+        Parameters
+        ----------
+        name: str
+            the name of the section
+        seconds: float
+            the duration
+        """
+        timings = self._timings.get(name)
+        if timings is None:
+            timings = self._timings[name] = deque(maxlen=self.size)
+        timings.append(seconds)
+
+    def summary(self):
+        """
+        Return statistics of the buffered durations of all sections
+
+        Returns
+        -------
+        dict:
+            the number of calls and the mean, 95th and 99th percentile and
+            maximum duration in milliseconds, for each section
+        """
+        stats = {}
+        for name, timings in self._timings.items():
+            ordered = sorted(timings)
+            stats[name] = {
+                "calls": len(ordered),
+                "mean_ms": 1000 * sum(ordered) / len(ordered),
+                "p95_ms": 1000 * ordered[int(0.95 * (len(ordered) - 1))],
+                "p99_ms": 1000 * ordered[int(0.99 * (len(ordered) - 1))],
+                "max_ms": 1000 * ordered[-1],
+            }
+        return stats
+
+    def overlay_lines(self, count=6):
+        """
+        Return text lines of the most expensive sections, for an overlay
+
+        Parameters
+        ----------
+        count: int, optional
+            the maximum number of sections
+
+        Returns
+        -------
+        list of str:
+            one line per section, by decreasing mean duration
+        """
+        stats = sorted(
+            self.summary().items(), key=lambda item: item[1]["mean_ms"], reverse=True
+        )
+        return [
+            f"{name}: {item['mean_ms']:.3f} ms (max {item['max_ms']:.3f})"
+            for name, item in stats[:count]
+        ]
+
+    def dump(self, filename):
+        """
+        Write the statistics and the buffered durations to a JSON file
+
+        Parameters
+        ----------
+        filename: str
+            the path to the file
+        """
+        with open(filename, "w") as fileobj:
+            json.dump(
+                {
+                    "summary": self.summary(),
+                    "timings": {
+                        name: list(timings) for name, timings in self._timings.items()
+                    },
+                },
+                fileobj,
+                indent=2,
+            )
+
+    def wrap(self, obj, method, name=None):
+        """
+        Replace a method of an object with one that records its durations
+
+        Parameters
+        ----------
+        obj: object
+            the instance to instrument
+        method: str
+            the name of the method
+        name: str, optional
+            the name of the section, by default the name of the method
+        """
+        func = getattr(obj, method)
+        name = name or method
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        setattr(obj, method, timed)
+
+
+def instrument(engine, profiler=None):
+    """
+    Record the durations of the tick, lock, drawing and input of an engine
+
+    How late each tick is called compared to when it was due is recorded as
+    the "tick_jitter" section. Must be called before the game is started, so
+    that the clock schedules the instrumented tick.
+
+    Parameters
+    ----------
+    engine: figgy.game_logic.Engine
+        the engine to instrument
+    profiler: Profiler, optional
+        the profiler to record to, by default a new one
+
+    Returns
+    -------
+    Profiler:
+        the profiler
+    """
+    profiler = profiler or Profiler()
+    due = [None]  # When the clock should call the tick next
+
+    def reschedules(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                due[0] = time.perf_counter() + engine.simulation.tick_interval
+
+        return wrapper
+
+    def timed_tick(tick):
+        @functools.wraps(tick)
+        def wrapper():
+            start = time.perf_counter()
+            if due[0] is not None:
+                profiler.record("tick_jitter", start - due[0])
+            due[0] = start + engine.simulation.tick_interval
+            tick()
+
+        return wrapper
+
+    engine._tick = timed_tick(engine._tick)
+    for method in ("_handle_fall_failure", "pause_game", "start_game"):
+        setattr(engine, method, reschedules(getattr(engine, method)))
+    for method in (
+        "_handle_fall_failure",
+        "_tick",
+        "draw",
+        "draw_dirty",
+        "drop",
+        "move_left",
+        "move_right",
+        "pause_game",
+        "rotate",
+        "start_game",
+        "update",
+    ):
+        profiler.wrap(engine, method)
+    profiler.wrap(engine.simulation, "check_lines")
+    return profiler
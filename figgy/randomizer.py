@@ -0,0 +1,247 @@
+"""
+Sources of the sequence of pieces of a game
+
+A source produces a stream of pieces, each a template index and an image
+name. The pieces are generated in chunks into a queue, so that spawning a
+piece only pops the queue, and any number of upcoming pieces can be previewed
+without changing the sequence. The state of a source, including the queued
+pieces, can be saved and restored, so that a game can be reproduced.
+"""
+import itertools
+import random
+from collections import deque
+
+
+class PieceSource:
+    """
+    A stream of pieces generated in chunks, the base class of all sources
+
+    Subclasses implement `_chunk`, `_seed`, `_state` and `_set_state`.
+
+    Parameters
+    ----------
+    chunk_size: int, optional
+        the approximate number of pieces generated at a time
+    """
+
+    def __init__(self, chunk_size=64):
+        self.chunk_size = chunk_size
+        self._queue = deque()
+
+    def getstate(self):
+        """
+        Return the state of the source, to be restored by `setstate`
+
+        Returns
+        -------
+        tuple:
+            the state of the generator and the queued pieces
+        """
+        return self._state(), tuple(self._queue)
+
+    def peek(self, count=1):
+        """
+        Return the upcoming pieces, without consuming them
+
+        Parameters
+        ----------
+        count: int, optional
+            the number of pieces
+
+        Returns
+        -------
+        tuple of tuple:
+            the template index and image of each piece
+        """
+        queue = self._queue
+        while len(queue) < count:
+            queue.extend(self._chunk())
+        return tuple(itertools.islice(queue, count))
+
+    def pop(self):
+        """
+        Consume the next piece
+
+        Returns
+        -------
+        tuple:
+            the template index and the image of the piece
+        """
+        queue = self._queue
+        if not queue:
+            queue.extend(self._chunk())
+        return queue.popleft()
+
+    def reset(self, seed=None):
+        """
+        Start a new sequence and drop the queued pieces
+
+        Parameters
+        ----------
+        seed: int, optional
+            if given, the sequence is determined by this seed
+        """
+        self._queue.clear()
+        self._seed(seed)
+
+    def setstate(self, state):
+        """
+        Restore a state returned by `getstate`
+
+        Parameters
+        ----------
+        state: tuple
+            the state
+        """
+        generator, queued = state
+        self._set_state(generator)
+        self._queue.clear()
+        self._queue.extend(queued)
+
+    def _chunk(self):
+        raise NotImplementedError
+
+    def _seed(self, seed):
+        raise NotImplementedError
+
+    def _set_state(self, state):
+        raise NotImplementedError
+
+    def _state(self):
+        raise NotImplementedError
+
+
+class UniformSource(PieceSource):
+    """
+    Chooses every template and image uniformly at random
+
+    For the same generator, the pieces are the same as the ones that were
+    chosen one at a time before the sources existed, so recorded seeds still
+    give the same games.
+
+    Parameters
+    ----------
+    n_templates: int
+        the number of templates
+    images: list of str
+        the images to choose from
+    rng: random.Random, optional
+        the random generator, by default a new one of the source
+    chunk_size: int, optional
+        the number of pieces generated at a time
+    """
+
+    def __init__(self, n_templates, images, rng=None, chunk_size=64):
+        super().__init__(chunk_size)
+        self.n_templates = n_templates
+        self.images = tuple(images)
+        self._rng = rng or random.Random()
+
+    def _chunk(self):
+        randrange, choice = self._rng.randrange, self._rng.choice
+        n_templates, images = self.n_templates, self.images
+        return [
+            (randrange(n_templates), choice(images)) for _ in range(self.chunk_size)
+        ]
+
+    def _seed(self, seed):
+        if seed is not None:
+            self._rng = random.Random(seed)
+
+    def _set_state(self, state):
+        self._rng.setstate(state)
+
+    def _state(self):
+        return self._rng.getstate()
+
+
+class BagSource(UniformSource):
+    """
+    Deals the templates from shuffled bags holding each template once
+
+    With seven templates this is the 7-bag randomizer, where a template never
+    comes again more than twelve pieces later. The images are chosen
+    uniformly at random.
+
+    Parameters
+    ----------
+    n_templates: int
+        the number of templates
+    images: list of str
+        the images to choose from
+    rng: random.Random, optional
+        the random generator, by default a new one of the source
+    chunk_size: int, optional
+        the number of pieces generated at a time, rounded up to whole bags
+    """
+
+    def _chunk(self):
+        rng = self._rng
+        templates = []
+        for _ in range(max(1, -(-self.chunk_size // self.n_templates))):
+            bag = list(range(self.n_templates))
+            rng.shuffle(bag)
+            templates.extend(bag)
+        return [(template, rng.choice(self.images)) for template in templates]
+
+
+class ReplaySource(PieceSource):
+    """
+    Plays back a fixed sequence of pieces, from its start on every reset
+
+    When the sequence is exhausted it starts over.
+
+    Parameters
+    ----------
+    pieces: list of tuple
+        the template index and image of each piece, at least one
+    chunk_size: int, optional
+        the number of pieces queued at a time
+    """
+
+    def __init__(self, pieces, chunk_size=64):
+        super().__init__(chunk_size)
+        self.pieces = tuple(pieces)
+        if not self.pieces:
+            raise ValueError("A replay source needs at least one piece")
+        self._position = 0
+
+    @classmethod
+    def record(cls, source, count, seed=None):
+        """
+        Create a source playing back the first pieces of another source
+
+        Parameters
+        ----------
+        source: PieceSource
+            the source to record, it is reset
+        count: int
+            the number of pieces to record
+        seed: int, optional
+            the seed to reset the recorded source with
+
+        Returns
+        -------
+        ReplaySource:
+            the new source
+        """
+        source.reset(seed)
+        return cls([source.pop() for _ in range(count)])
+
+    def _chunk(self):
+        pieces = self.pieces
+        chunk = []
+        while len(chunk) < self.chunk_size:
+            taken = pieces[self._position : self._position + self.chunk_size]
+            chunk.extend(taken)
+            self._position = (self._position + len(taken)) % len(pieces)
+        return chunk
+
+    def _seed(self, seed):
+        self._position = 0
+
+    def _set_state(self, state):
+        self._position = state
+
+    def _state(self):
+        return self._position
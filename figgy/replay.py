@@ -0,0 +1,277 @@
+"""
+Recording of games in a compact binary log and fast-forward replay
+
+A log stores the seed and the size of the board of the game and the stream
+of actions applied to it,
+the ticks as well as the inputs of the player. Each event is packed in a
+single 64-bit word, the milliseconds since the start of the game in the upper
+61 bits and the action code in the lower 3 bits, so that a game can last, or
+stay paused, for any time.
+"""
+import bisect
+import random
+import struct
+import sys
+from array import array
+
+from figgy import resources
+from figgy.simulation import TICK, Simulation
+
+PAUSE = 5
+
+_CODE_BITS = 3
+_CODE_MASK = (1 << _CODE_BITS) - 1
+_MAX_TIME_MS = 1 << (64 - _CODE_BITS)
+
+
+class ReplayLog:
+    """
+    The seed, the board size and the timestamped actions of a single game
+
+    Parameters
+    ----------
+    seed: int
+        the seed of the random generator choosing the pieces
+    width: int, optional
+        the number of columns of the board, by default the one of `Simulation`
+    height: int, optional
+        the number of lines of the board, by default the one of `Simulation`
+    """
+
+    magic = b"FGRP"
+    version = 4
+    _header = struct.Struct("<4sHQHH")
+
+    def __init__(self, seed, width=None, height=None):
+        self.seed = seed
+        self.width = width or Simulation.scene_width
+        self.height = height or Simulation.scene_height
+        self._events = array("Q")
+
+    def __iter__(self):
+        for event in self._events:
+            yield event >> _CODE_BITS, event & _CODE_MASK
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def codes(self):
+        """ The action codes of all events, in order
+        """
+        return [event & _CODE_MASK for event in self._events]
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Create a log from its binary representation
+
+        Parameters
+        ----------
+        data: bytes
+            the packed log
+
+        Returns
+        -------
+        ReplayLog:
+            the unpacked log
+
+        Raises
+        ------
+        ValueError
+            if the data is not a Figgy replay log
+        """
+        if len(data) < cls._header.size:
+            raise ValueError("Not a Figgy replay log of a supported version")
+        magic, version, seed, width, height = cls._header.unpack_from(data)
+        if magic != cls.magic or version != cls.version:
+            raise ValueError("Not a Figgy replay log of a supported version")
+        log = cls(seed, width, height)
+        log._events.frombytes(data[cls._header.size :])
+        if sys.byteorder == "big":
+            log._events.byteswap()
+        return log
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load a log from a file
+
+        Parameters
+        ----------
+        filename: str
+            the path to the file
+
+        Returns
+        -------
+        ReplayLog:
+            the loaded log
+        """
+        with open(filename, "rb") as fileobj:
+            return cls.from_bytes(fileobj.read())
+
+    def record(self, code, time_ms):
+        """
+        Add an event at the end of the log
+
+        Parameters
+        ----------
+        code: int
+            the code of the action
+        time_ms: int
+            the number of milliseconds since the start of the game
+
+        Raises
+        ------
+        ValueError
+            if the time is negative or does not fit in an event
+        """
+        if not 0 <= time_ms < _MAX_TIME_MS:
+            raise ValueError(f"Time of a replay event out of range: {time_ms} ms")
+        self._events.append(time_ms << _CODE_BITS | code)
+
+    def save(self, filename):
+        """
+        Write the log to a file
+
+        Parameters
+        ----------
+        filename: str
+            the path to the file
+        """
+        with open(filename, "wb") as fileobj:
+            fileobj.write(self.to_bytes())
+
+    def to_bytes(self):
+        """
+        Return the binary representation of the log
+
+        Returns
+        -------
+        bytes:
+            the packed log
+        """
+        events = self._events
+        if sys.byteorder == "big":
+            events = array("Q", events)
+            events.byteswap()
+        header = self._header.pack(
+            self.magic, self.version, self.seed, self.width, self.height
+        )
+        return header + events.tobytes()
+
+
+class ReplayEngine:
+    """
+    Re-simulates a recorded game headless, as fast as possible
+
+    While playing forward, a snapshot of the game is taken at regular tick
+    intervals, so that seeking to a tick only re-simulates from the closest
+    earlier snapshot.
+
+    Parameters
+    ----------
+    log: ReplayLog
+        the recorded game
+    object_templates: figgy.templates.TemplateSet, optional
+        the templates of the recorded game, by default the shipped ones
+    images: list of str, optional
+        the images of the recorded game, by default the shipped ones
+    snapshot_interval: int, optional
+        the number of ticks between snapshots
+    source: figgy.randomizer.PieceSource, optional
+        the kind of piece source of the recorded game, it is reset with the
+        seed of the log, by default uniformly random pieces
+    """
+
+    def __init__(
+        self,
+        log,
+        object_templates=None,
+        images=None,
+        snapshot_interval=1000,
+        source=None,
+    ):
+        self._sim = Simulation(
+            object_templates or resources.load_templates(),
+            images or resources.image_names(),
+            rng=random.Random(),
+            width=log.width,
+            height=log.height,
+            source=source,
+        )
+        self._codes = log.codes
+        self._seed = log.seed
+        self._snapshot_interval = snapshot_interval
+        self._snapshots = []  # Tuples of tick, event index and state
+        self.rewind()
+
+    @property
+    def simulation(self):
+        return self._sim
+
+    @property
+    def tick(self):
+        return self._tick
+
+    def rewind(self):
+        """ Go back to the start of the game
+        """
+        self._sim.start_game(self._seed)
+        self._position = 0
+        self._tick = 0
+
+    def run(self):
+        """
+        Play the game until the end of the log
+
+        Returns
+        -------
+        figgy.simulation.Simulation:
+            the simulation at the end of the game
+        """
+        self._advance(None)
+        return self._sim
+
+    def seek(self, tick):
+        """
+        Move to the state just after a tick
+
+        Parameters
+        ----------
+        tick: int
+            the number of ticks since the start of the game
+
+        Returns
+        -------
+        figgy.simulation.Simulation:
+            the simulation at the tick
+        """
+        idx = bisect.bisect_right([snapshot[0] for snapshot in self._snapshots], tick)
+        if tick < self._tick or (idx and self._snapshots[idx - 1][0] > self._tick):
+            if idx:
+                self._tick, self._position, state = self._snapshots[idx - 1]
+                self._sim.restore(state)
+            else:
+                self.rewind()
+        self._advance(tick)
+        return self._sim
+
+    def _advance(self, until_tick):
+        sim = self._sim
+        codes = self._codes
+        interval = self._snapshot_interval
+        last_snapshot = self._snapshots[-1][0] if self._snapshots else 0
+        while self._position < len(codes):
+            if until_tick is not None and self._tick >= until_tick:
+                break
+            code = codes[self._position]
+            self._position += 1
+            if code != PAUSE:
+                sim.apply(code)
+            if code != TICK:
+                continue
+            self._tick += 1
+            if self._tick % interval == 0 and self._tick > last_snapshot:
+                self._snapshots.append((self._tick, self._position, sim.snapshot()))
+                last_snapshot = self._tick
@@ -0,0 +1,43 @@
+"""
+Access to the resources shipped with Figgy, without importing pygame
+
+The resources are only looked up once per process.
+"""
+import functools
+import glob
+import os
+
+from figgy.templates import TemplateSet
+
+FIGGY_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def image_names():
+    """
+    Return the names of the block images
+
+    Returns
+    -------
+    tuple of str:
+        the image names, without directory and extension, in sorted order
+    """
+    return tuple(
+        sorted(
+            os.path.splitext(os.path.basename(filename))[0]
+            for filename in glob.glob(os.path.join(FIGGY_PATH, "images", "*.png"))
+        )
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_templates():
+    """
+    Load the object templates shipped with Figgy
+
+    Returns
+    -------
+    figgy.templates.TemplateSet:
+        the templates from templates.json
+    """
+    return TemplateSet.from_file(os.path.join(FIGGY_PATH, "templates.json"))
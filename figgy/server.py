@@ -0,0 +1,518 @@
+"""
+An asyncio server hosting many headless games, streaming board deltas
+
+Every player that connects gets a session, a `figgy.simulation.Simulation`
+advanced by a `figgy.stepper.FixedStepper`. All sessions run in one event loop
+and are stepped together once per timestep. Players send their inputs, and
+after every step the player and the spectators of a session are sent what
+changed: the cells of the board that changed, the pose of the falling piece
+and the cleared rows, instead of the whole board.
+
+The protocol is one JSON object per line, with a "type" key. A client first
+sends either
+
+    {"type": "join", "seed": 42}     play a new game, the seed is optional
+    {"type": "watch", "session": 3}  follow the game of another player
+
+and receives a "state" message with the whole game. A player then sends
+
+    {"type": "input", "action": 4}   an action code of figgy.simulation
+    {"type": "start"}                start a new game when the last one ended
+
+and every client receives "delta" messages with the keys
+
+    tick     the number of steps of the session
+    cleared  the removed rows, to remove from the board first
+    cells    [col, line, image] for every other changed cell, image is None
+             for a cell that was emptied
+    piece    [template, rotation, col, line, image] of the falling piece
+    lines    the number of completed lines
+    over     True when the game has ended
+
+where all keys except the tick are only sent when they changed. Two players
+that join with the same seed get the same pieces, for a head-to-head match.
+"""
+import asyncio
+import itertools
+import json
+import random
+
+from figgy import resources
+from figgy.board import BitBoard
+from figgy.profiling import Profiler
+from figgy.randomizer import UniformSource
+from figgy.simulation import DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, Piece, Simulation
+from figgy.stepper import FixedStepper
+
+INPUTS = (MOVE_LEFT, MOVE_RIGHT, ROTATE, DROP)
+
+
+def encode(message):
+    """ Return a message as a line of compact JSON
+    """
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class Session:
+    """
+    A single game, and the state last sent to its clients
+
+    Parameters
+    ----------
+    session_id: int
+        the identifier of the session
+    sim: figgy.simulation.Simulation
+        the game
+    timestep: float
+        the duration of a step in seconds
+    """
+
+    def __init__(self, session_id, sim, timestep):
+        self.session_id = session_id
+        self.sim = sim
+        self.stepper = FixedStepper.for_simulation(sim, timestep)
+        self.player = None  # The writer of the player
+        self.writers = []  # The player first, then the spectators
+        self._sent_board = {}
+        self._sent_piece = None
+        self._sent_lines = 0
+        self._sent_pieces = 0
+        self._sent_running = False
+
+    def delta(self):
+        """
+        Return what changed since the last delta or state
+
+        Returns
+        -------
+        dict:
+            the delta message, or None if nothing changed
+        """
+        sim = self.sim
+        message = {"type": "delta", "tick": self.stepper.steps}
+        if sim.pieces_placed == self._sent_pieces + 1:
+            # The board only changes when a piece is locked, and the locked
+            # piece is the one last sent
+            cleared = sim.cleared_lines
+            board = self._sent_board
+            if cleared:
+                message["cleared"] = cleared
+                board = self._sent_board = _remove_lines(board, cleared)
+            image = self._sent_piece[4]
+            cells = [
+                (col, line + sum(1 for other in cleared if other > line))
+                for col, line in sim.locked_cells
+                if line not in cleared
+            ]
+            board.update((pos, image) for pos in cells)
+            message["cells"] = [[col, line, image] for col, line in cells]
+            self._sent_pieces = sim.pieces_placed
+        elif sim.pieces_placed != self._sent_pieces:
+            # More than one lock since the last delta, the boards are compared
+            cleared = sim.cleared_lines
+            board = self._sent_board
+            if cleared:
+                message["cleared"] = cleared
+                board = _remove_lines(board, cleared)
+            current = dict(sim.board.items())
+            message["cells"] = [
+                [col, line, current.get((col, line))]
+                for col, line in board.keys() ^ current.keys()
+            ]
+            message["cells"].extend(
+                [col, line, image]
+                for (col, line), image in current.items()
+                if board.get((col, line), image) != image
+            )
+            self._sent_board = current
+            self._sent_pieces = sim.pieces_placed
+        piece = _pose(sim.current)
+        if piece != self._sent_piece:
+            message["piece"] = self._sent_piece = piece
+        if sim.completed_lines != self._sent_lines:
+            message["lines"] = self._sent_lines = sim.completed_lines
+        if sim.is_running != self._sent_running:
+            self._sent_running = sim.is_running
+            if not sim.is_running:
+                message["over"] = True
+        return message if len(message) > 2 else None
+
+    def start(self, seed=None):
+        """
+        Start a new game, the clients should be sent a new `state`
+
+        Parameters
+        ----------
+        seed: int, optional
+            the seed of the random generator choosing the pieces
+        """
+        self.sim.start_game(seed)
+        self.stepper.reset()
+
+    def state(self):
+        """
+        Return the whole game, and send deltas relative to it from now on
+
+        Returns
+        -------
+        dict:
+            the state message, with the size of the board, the session, and
+            the keys of a delta from an empty board
+        """
+        sim = self.sim
+        self._sent_board = dict(sim.board.items())
+        self._sent_piece = _pose(sim.current)
+        self._sent_lines = sim.completed_lines
+        self._sent_pieces = sim.pieces_placed
+        self._sent_running = sim.is_running
+        return {
+            "type": "state",
+            "session": self.session_id,
+            "width": sim.scene_width,
+            "height": sim.scene_height,
+            "tick": self.stepper.steps,
+            "cells": [
+                [col, line, image] for (col, line), image in self._sent_board.items()
+            ],
+            "piece": self._sent_piece,
+            "lines": self._sent_lines,
+            "over": not sim.is_running,
+        }
+
+
+class GameServer:
+    """
+    Hosts the sessions of a number of players in one event loop
+
+    The durations of the steps are recorded in `profiler`: "tick_busy" is the
+    time spent stepping all sessions and writing the deltas, and
+    "tick_latency" is the time from when a step was due until its deltas
+    were written.
+
+    Parameters
+    ----------
+    object_templates: figgy.templates.TemplateSet, optional
+        the templates of the pieces, by default the ones in templates.json
+    images: list of str, optional
+        the images of the pieces, by default the shipped ones
+    timestep: float, optional
+        the duration of a step in seconds
+    board_class: type, optional
+        the board backend of the games
+    max_buffer: int, optional
+        the number of unsent bytes above which a slow client is disconnected
+    source_factory: callable, optional
+        called without arguments for every new session, returns the
+        `figgy.randomizer.PieceSource` of its game, e.g.
+        ``functools.partial(BagSource, 7, images)``; by default the pieces are
+        chosen uniformly at random
+    """
+
+    def __init__(
+        self,
+        object_templates=None,
+        images=None,
+        timestep=1.0 / 60,
+        board_class=BitBoard,
+        max_buffer=1 << 20,
+        source_factory=None,
+    ):
+        self.object_templates = object_templates or resources.load_templates()
+        self.images = images or resources.image_names()
+        self.timestep = timestep
+        self.board_class = board_class
+        self.max_buffer = max_buffer
+        self.source_factory = source_factory or self._uniform_source
+        self.sessions = {}
+        self.profiler = Profiler(size=10000)
+        self._ids = itertools.count(1)
+        self._server = None
+        self._loop_task = None
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """ Stop accepting clients and stop stepping the sessions
+        """
+        self._loop_task.cancel()
+        self._server.close()
+        for session in self.sessions.values():
+            for writer in session.writers:
+                writer.close()
+        await self._server.wait_closed()
+
+    def new_session(self, seed=None):
+        """
+        Create a session and start its game
+
+        Parameters
+        ----------
+        seed: int, optional
+            the seed of the random generator choosing the pieces
+
+        Returns
+        -------
+        Session:
+            the new session
+        """
+        source = self.source_factory()
+        sim = Simulation(
+            self.object_templates, self.images, self.board_class, source=source
+        )
+        session = Session(next(self._ids), sim, self.timestep)
+        session.start(seed)
+        self.sessions[session.session_id] = session
+        return session
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Start accepting clients and stepping the sessions
+
+        Parameters
+        ----------
+        host: str, optional
+            the address to listen on
+        port: int, optional
+            the port to listen on, by default any free port, see `port`
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self._loop_task = asyncio.ensure_future(self._run())
+
+    def step(self):
+        """ Advance all sessions one step and send their deltas
+        """
+        for session in list(self.sessions.values()):
+            if session.sim.is_running:
+                session.stepper.step()
+            message = session.delta()
+            if message is not None:
+                self._broadcast(session, encode(message))
+
+    def _broadcast(self, session, data):
+        for writer in list(session.writers):
+            if writer.transport.get_write_buffer_size() <= self.max_buffer:
+                writer.write(data)
+            elif writer is session.player:
+                self._drop(session)
+                return
+            else:
+                writer.close()
+                session.writers.remove(writer)
+
+    def _drop(self, session):
+        # The player left, the spectators are disconnected as well
+        self.sessions.pop(session.session_id, None)
+        for writer in session.writers:
+            writer.close()
+        session.writers.clear()
+
+    async def _handle(self, reader, writer):
+        session = None
+        try:
+            hello = json.loads(await reader.readline() or "{}")
+            if hello.get("type") == "join":
+                session = self.new_session(hello.get("seed"))
+            elif hello.get("type") == "watch":
+                session = self.sessions.get(hello.get("session"))
+            if session is None:
+                return
+            writer.write(encode(session.state()))
+            session.writers.append(writer)
+            if hello["type"] == "join":
+                session.player = writer
+            if hello["type"] == "watch":
+                while await reader.read(4096):
+                    pass  # Spectators only listen, what they send is dropped
+                return
+            async for line in reader:
+                message = json.loads(line)
+                if message["type"] == "input" and message["action"] in INPUTS:
+                    session.stepper.push(message["action"])
+                elif message["type"] == "start" and not session.sim.is_running:
+                    session.start(message.get("seed"))
+                    self._broadcast(session, encode(session.state()))
+        except (ConnectionError, ValueError, KeyError, TypeError, AttributeError):
+            pass  # The client is dropped, also for JSON that is not an object
+        finally:
+            if session is not None:
+                if session.player is writer:
+                    self._drop(session)
+                elif writer in session.writers:
+                    session.writers.remove(writer)
+            writer.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while True:
+            due += self.timestep
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = loop.time()
+            self.step()
+            end = loop.time()
+            self.profiler.record("tick_busy", end - start)
+            self.profiler.record("tick_latency", end - due)
+            if end - due > 0.25:
+                due = end  # Skip the steps that are too late to catch up
+            await asyncio.sleep(0)  # Let the clients be served in any case
+
+    def _uniform_source(self):
+        return UniformSource(len(self.object_templates), self.images, random.Random())
+
+
+class Client:
+    """
+    A client that mirrors the game of a session from the server messages
+
+    A stand-in for a real front end, e.g. to test the server or to load it.
+
+    Parameters
+    ----------
+    object_templates: figgy.templates.TemplateSet, optional
+        the templates of the pieces, to find the cells of the falling piece
+    """
+
+    def __init__(self, object_templates=None):
+        self.object_templates = object_templates or resources.load_templates()
+        self.session = None
+        self.width = None
+        self.height = None
+        self.tick = 0
+        self.board = {}  # Grid position to image
+        self.piece = None
+        self.lines = 0
+        self.over = False
+        self._reader = None
+        self._writer = None
+
+    def apply(self, message):
+        """
+        Update the mirror with a state or delta message
+
+        Parameters
+        ----------
+        message: dict
+            the decoded message
+        """
+        if message["type"] == "state":
+            self.session = message["session"]
+            self.width = message["width"]
+            self.height = message["height"]
+            self.board = {}
+        self.tick = message["tick"]
+        if "cleared" in message:
+            self.board = _remove_lines(self.board, message["cleared"])
+        for col, line, image in message.get("cells", ()):
+            if image is None:
+                self.board.pop((col, line), None)
+            else:
+                self.board[(col, line)] = image
+        self.piece = message.get("piece", self.piece)
+        self.lines = message.get("lines", self.lines)
+        self.over = message.get("over", self.over)
+
+    def cells(self):
+        """
+        Return the cells of the falling piece
+
+        Returns
+        -------
+        list of tuple of int:
+            the grid positions
+        """
+        template, rotation, col, line, image = self.piece
+        piece = Piece(self.object_templates, template, image, self.width, self.height)
+        piece.anchor = (col, line)
+        piece.rotation = rotation
+        return piece.cells()
+
+    async def close(self):
+        self._writer.close()
+
+    async def join(self, host, port, seed=None):
+        """
+        Connect to a server and play a new game
+
+        Parameters
+        ----------
+        host: str
+            the address of the server
+        port: int
+            the port of the server
+        seed: int, optional
+            the seed of the random generator choosing the pieces
+        """
+        await self._connect(host, port, {"type": "join", "seed": seed})
+
+    async def receive(self):
+        """
+        Wait for the next message and apply it
+
+        Returns
+        -------
+        dict:
+            the message, or None if the server closed the connection
+        """
+        line = await self._reader.readline()
+        if not line:
+            return None
+        message = json.loads(line)
+        self.apply(message)
+        return message
+
+    async def send(self, action):
+        """
+        Send an input to the server
+
+        Parameters
+        ----------
+        action: int
+            one of the codes in `INPUTS`
+        """
+        self._writer.write(encode({"type": "input", "action": action}))
+        await self._writer.drain()
+
+    async def watch(self, host, port, session):
+        """
+        Connect to a server and follow the game of a session
+
+        Parameters
+        ----------
+        host: str
+            the address of the server
+        port: int
+            the port of the server
+        session: int
+            the identifier of the session
+        """
+        await self._connect(host, port, {"type": "watch", "session": session})
+
+    async def _connect(self, host, port, hello):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._writer.write(encode(hello))
+        await self._writer.drain()
+        await self.receive()
+
+
+def _pose(piece):
+    return [
+        piece.template,
+        piece.rotation,
+        piece.anchor[0],
+        piece.anchor[1],
+        piece.image,
+    ]
+
+
+def _remove_lines(cells, lines):
+    # Remove the lines from a dictionary of cells, moving the lines above down
+    removed = set(lines)
+    moved = {}
+    for (col, line), image in cells.items():
+        if line not in removed:
+            moved[(col, line + sum(1 for other in lines if other > line))] = image
+    return moved
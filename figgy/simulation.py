@@ -0,0 +1,558 @@
+"""
+The pure-data simulation core of Figgy
+
+Nothing in this module depends on pygame or pgzero, so it can be used to run
+games headless, e.g. for bots, replays or batch runs.
+"""
+
+from collections import namedtuple
+
+from figgy.board import Board
+from figgy.randomizer import UniformSource
+from figgy.templates import TemplateSet
+from figgy.zobrist import piece_hash
+
+# Codes of the actions that can be applied to a game
+TICK = 0
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+ROTATE = 3
+DROP = 4
+
+
+def spawn_position(width):
+    """
+    Return the anchor of new pieces on a scene
+
+    Parameters
+    ----------
+    width: int
+        the number of columns of the scene
+
+    Returns
+    -------
+    tuple of int:
+        the column and line of the anchor
+    """
+    return width // 2, 1
+
+
+class FallFailure(Exception):
+    """ A class to signal a failure to move a falling object downwards"""
+
+    pass
+
+
+class Piece:
+    """
+    A falling piece, made up of a template of cell offsets around an anchor
+
+    The piece will be anchored at the top of the scene. The orientations of the
+    template are looked up in a precomputed `figgy.templates.TemplateSet`.
+
+    Parameters
+    ----------
+    templates: figgy.templates.TemplateSet
+        the set of templates
+    template: int
+        the index of the template of the piece
+    image: str
+        the name of the image of all blocks
+    width: int
+        the number of columns of the scene
+    height: int
+        the number of lines of the scene
+    """
+
+    __slots__ = (
+        "template",
+        "image",
+        "anchor",
+        "rotation",
+        "symmetric",
+        "fallen",
+        "_orientations",
+        "_width",
+        "_height",
+    )
+
+    def __init__(self, templates, template, image, width, height):
+        self.template = template
+        self.image = image
+        self.anchor = spawn_position(width)
+        self.rotation = 0
+        self.symmetric = templates.symmetric[template]
+        self.fallen = False
+        self._orientations = templates.orientations[template]
+        self._width = width
+        self._height = height
+
+    @property
+    def offsets(self):
+        return self._orientations[self.rotation]
+
+    @property
+    def zobrist(self):
+        return piece_hash(self.template, self.rotation, self.anchor, self.fallen)
+
+    def cells(self):
+        """
+        Return the grid positions occupied by the piece
+
+        Returns
+        -------
+        list of tuple of int:
+            the grid positions, in the order of the template
+        """
+        anchor_x, anchor_y = self.anchor
+        return [(anchor_x + x, anchor_y + y) for x, y in self.offsets]
+
+    def drop_distance(self, fixed_blocks):
+        """
+        Return how many lines the piece can fall before it lands
+
+        If the board keeps column heights and every block of the piece is above
+        the surface, the distance is read from the heights. Otherwise, the
+        board is swept downwards from each block of the piece, never further
+        than the shortest distance found so far.
+
+        Parameters
+        ----------
+        fixed_blocks: Board or dict
+            the fixed blocks
+
+        Returns
+        -------
+        int:
+            the number of lines to the landing position
+        """
+        cells = self.cells()
+        if hasattr(fixed_blocks, "column_height"):
+            tops = [self._height - fixed_blocks.column_height(col) for col, _ in cells]
+            if all(line < top for (_, line), top in zip(cells, tops)):
+                return min(top - line - 1 for (_, line), top in zip(cells, tops))
+
+        distance = self._height
+        for col, line in cells:
+            free = 0
+            line += 1
+            while free < distance and line < self._height:
+                if (col, line) in fixed_blocks:
+                    break
+                free += 1
+                line += 1
+            distance = free
+        return distance
+
+    def move_down(self, fixed_blocks):
+        """
+        Move the piece downwards if it is possible
+
+        Parameters
+        ----------
+        fixed_blocks: Board or dict
+            the fixed blocks
+
+        Raises
+        ------
+        FallFailure
+            if it is not possible to move downwards
+        """
+        if not self._can_fall(fixed_blocks):
+            raise FallFailure
+        self.anchor = (self.anchor[0], self.anchor[1] + 1)
+        self.fallen = True
+
+    def move_left(self, fixed_blocks):
+        """
+        Move the piece to the left if it is possible
+
+        Parameters
+        ----------
+        fixed_blocks: Board or dict
+            the fixed blocks
+
+        Returns
+        -------
+        bool:
+            True if the piece was moved
+        """
+        return self._shift(fixed_blocks, -1)
+
+    def move_right(self, fixed_blocks):
+        """
+        Move the piece to the right if it is possible
+
+        Parameters
+        ----------
+        fixed_blocks: Board or dict
+            the fixed blocks
+
+        Returns
+        -------
+        bool:
+            True if the piece was moved
+        """
+        return self._shift(fixed_blocks, +1)
+
+    def rotate(self, fixed_blocks):
+        """
+        Rotate the piece a quarter turn about its anchor if it is possible
+
+        Parameters
+        ----------
+        fixed_blocks: Board or dict
+            the fixed blocks
+
+        Returns
+        -------
+        bool:
+            True if the piece was rotated
+        """
+        if self.symmetric:  # Don't rotate the square box
+            return False
+        rotation = (self.rotation + 1) % 4
+        if not self._fits(fixed_blocks, self._orientations[rotation]):
+            return False
+        self.rotation = rotation
+        return True
+
+    def _can_fall(self, fixed_blocks):
+        for col, line in self.cells():
+            if line == self._height - 1 or (col, line + 1) in fixed_blocks:
+                return False
+        return True
+
+    def _fits(self, fixed_blocks, offsets):
+        anchor_x, anchor_y = self.anchor
+        for x, y in offsets:
+            col, line = anchor_x + x, anchor_y + y
+            if (
+                col < 0
+                or col >= self._width
+                or line < 0
+                or line >= self._height
+                or (col, line) in fixed_blocks
+            ):
+                return False
+        return True
+
+    def _shift(self, fixed_blocks, delta):
+        cells = self.cells()
+        if min(line for _, line in cells) < 0:
+            return False
+        for col, line in cells:
+            if (
+                not 0 <= col + delta < self._width
+                or (col + delta, line) in fixed_blocks
+            ):
+                return False
+        self.anchor = (self.anchor[0] + delta, self.anchor[1])
+        return True
+
+
+SimulationState = namedtuple(
+    "SimulationState",
+    [
+        "board",
+        "piece",
+        "is_running",
+        "tick_interval",
+        "completed_lines",
+        "pieces_placed",
+        "source_state",
+    ],
+)
+
+
+class Simulation:
+    """
+    The rules of the game, operating on integer grid state only
+
+    Parameters
+    ----------
+    object_templates: figgy.templates.TemplateSet or list
+        the object templates to choose the shape of the pieces from
+    images: list of str
+        a list of image names to choose the image of the pieces from
+    board_class: type, optional
+        the board backend, e.g. `figgy.board.Board` or `figgy.board.BitBoard`
+    rng: random.Random, optional
+        the random generator choosing the pieces, by default a new one, so that
+        restoring a snapshot does not change the global random state
+    width: int, optional
+        the number of columns of the scene, by default `scene_width`
+    height: int, optional
+        the number of lines of the scene, by default `scene_height`
+    source: figgy.randomizer.PieceSource, optional
+        the sequence of pieces, by default a `figgy.randomizer.UniformSource`
+        drawing from `rng`
+    preview: int, optional
+        the number of upcoming pieces in `upcoming`
+    """
+
+    scene_height = 25
+    scene_width = 12
+    default_tick_interval = 1.25
+
+    def __init__(
+        self,
+        object_templates,
+        images,
+        board_class=Board,
+        rng=None,
+        width=None,
+        height=None,
+        source=None,
+        preview=1,
+    ):
+        self.scene_width = width or self.scene_width
+        self.scene_height = height or self.scene_height
+        self.board = board_class(self.scene_width, self.scene_height)
+        self.current = None
+        self.is_running = False
+        self.tick_interval = self.default_tick_interval
+        self.completed_lines = 0
+        self.cleared_lines = []
+        self.locked_cells = []
+        self.pieces_placed = 0
+        self.preview = preview
+        if not isinstance(object_templates, TemplateSet):
+            object_templates = TemplateSet(object_templates)
+        self._object_templates = object_templates
+        self._images = images
+        self._source = source or UniformSource(len(object_templates), images, rng)
+
+    @property
+    def next_piece(self):
+        """ The template index and image of the next piece
+        """
+        return self._source.peek()[0]
+
+    @property
+    def object_templates(self):
+        return self._object_templates
+
+    @property
+    def source(self):
+        return self._source
+
+    @property
+    def upcoming(self):
+        """ The template indices and images of the next `preview` pieces
+        """
+        return self._source.peek(self.preview)
+
+    def apply(self, code):
+        """
+        Apply an action to the game
+
+        Parameters
+        ----------
+        code: int
+            one of TICK, MOVE_LEFT, MOVE_RIGHT, ROTATE or DROP
+
+        Raises
+        ------
+        ValueError
+            if the code is not the one of an action
+        """
+        if code == TICK:
+            self.tick()
+        elif code == MOVE_LEFT:
+            self.move_left()
+        elif code == MOVE_RIGHT:
+            self.move_right()
+        elif code == ROTATE:
+            self.rotate()
+        elif code == DROP:
+            self.drop()
+        else:
+            raise ValueError(f"Unknown action code: {code}")
+
+    def check_lines(self, lines=None):
+        """
+        Remove all complete lines and update the line count and tick interval
+
+        The removed lines are stored in `cleared_lines`
+
+        Parameters
+        ----------
+        lines: iterable of int, optional
+            the lines that could be complete, by default all lines
+        """
+        if lines is None:
+            lines = range(self.scene_height)
+        self.cleared_lines = sorted(
+            line for line in set(lines) if self.board.is_line_full(line)
+        )
+        if not self.cleared_lines:
+            return
+        self.board.remove_lines(self.cleared_lines)
+        for _ in self.cleared_lines:
+            self.completed_lines += 1
+            if self.completed_lines % 4 == 0:
+                self.tick_interval = max(0.02, self.tick_interval - 0.1)
+
+    def drop(self):
+        """ Move the falling piece to its landing position and lock it
+        """
+        if self.is_running:
+            self.land()
+            self.lock()
+
+    def land(self):
+        """
+        Move the falling piece to its landing position, without locking it
+
+        Returns
+        -------
+        int:
+            the number of lines the piece fell
+        """
+        current = self.current
+        distance = current.drop_distance(self.board)
+        if distance:
+            current.anchor = (current.anchor[0], current.anchor[1] + distance)
+            current.fallen = True
+        return distance
+
+    def lock(self):
+        """
+        Fix the falling piece on the board and spawn a new one
+
+        The cells of the piece are stored in `locked_cells`, before any line
+        is removed. If the piece never fell, the game is over instead
+        """
+        if not self.current.fallen:  # Stop game
+            self.is_running = False
+        else:
+            cells = self.locked_cells = self.current.cells()
+            self.board.add(cells, self.current.image)
+            self.pieces_placed += 1
+            self.check_lines(line for _, line in cells)
+            self.new_piece()
+
+    def move_left(self):
+        """ Move the falling piece to the left
+        """
+        if self.is_running:
+            self.current.move_left(self.board)
+
+    def move_right(self):
+        """ Move the falling piece to the right
+        """
+        if self.is_running:
+            self.current.move_right(self.board)
+
+    def new_piece(self):
+        """ Spawn the next piece at the top of the scene and choose a new next piece
+        """
+        template, image = self._source.pop()
+        self.current = Piece(
+            self._object_templates,
+            template,
+            image,
+            self.scene_width,
+            self.scene_height,
+        )
+
+    def restore(self, state):
+        """
+        Restore the game from a snapshot
+
+        Parameters
+        ----------
+        state: SimulationState
+            a snapshot created by `snapshot`
+        """
+        self.board.restore(state.board)
+        template, image, anchor, rotation, fallen = state.piece
+        self.current = Piece(
+            self._object_templates,
+            template,
+            image,
+            self.scene_width,
+            self.scene_height,
+        )
+        self.current.anchor = anchor
+        self.current.rotation = rotation
+        self.current.fallen = fallen
+        self.is_running = state.is_running
+        self.tick_interval = state.tick_interval
+        self.completed_lines = state.completed_lines
+        self.pieces_placed = state.pieces_placed
+        self._source.setstate(state.source_state)
+
+    def rotate(self):
+        """ Rotate the falling piece
+        """
+        if self.is_running:
+            self.current.rotate(self.board)
+
+    def state_hash(self):
+        """
+        Return the Zobrist hash of the board and the falling piece
+
+        Returns
+        -------
+        int:
+            the 64-bit hash, equal for games with the same filled cells and
+            the same falling piece
+        """
+        return self.board.zobrist ^ self.current.zobrist
+
+    def snapshot(self):
+        """
+        Return an immutable copy of the state of the game
+
+        Returns
+        -------
+        SimulationState:
+            the board, the falling piece, the counters and the state of the
+            piece source, including the upcoming pieces
+        """
+        piece = self.current
+        return SimulationState(
+            self.board.snapshot(),
+            (piece.template, piece.image, piece.anchor, piece.rotation, piece.fallen),
+            self.is_running,
+            self.tick_interval,
+            self.completed_lines,
+            self.pieces_placed,
+            self._source.getstate(),
+        )
+
+    def start_game(self, seed=None):
+        """
+        Starts a new game
+
+        Parameters
+        ----------
+        seed: int, optional
+            if given, the sequence of pieces is restarted from this seed
+        """
+        self._source.reset(seed)
+        self.board.clear()
+        self.is_running = True
+        self.tick_interval = self.default_tick_interval
+        self.completed_lines = 0
+        self.locked_cells = []
+        self.pieces_placed = 0
+        self.new_piece()
+
+    def tick(self):
+        """
+        Advance the game one step, moving the falling piece downwards
+
+        Returns
+        -------
+        bool:
+            True if the falling piece could not fall and was locked
+        """
+        try:
+            self.current.move_down(self.board)
+        except FallFailure:
+            self.lock()
+            return True
+        return False
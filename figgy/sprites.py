@@ -0,0 +1,167 @@
+"""
+Cached loading and drawing of the block images
+
+Images are loaded, and scaled to the block size, once per process and shared
+by all engines. Optionally,
+all tiles are packed into a single atlas surface and drawn as subregions of it.
+"""
+import functools
+
+import pygame
+from pgzero import loaders
+
+
+@functools.lru_cache(maxsize=None)
+def load_image(name):
+    """
+    Load an image resource, only once per process
+
+    Parameters
+    ----------
+    name: str
+        the name of the image, without directory and extension
+
+    Returns
+    -------
+    pygame.Surface:
+        the loaded image
+    """
+    return loaders.images.load(name)
+
+
+@functools.lru_cache(maxsize=None)
+def scaled_image(name, size):
+    """
+    Return an image resource scaled to a square size, only once per process
+
+    Parameters
+    ----------
+    name: str
+        the name of the image, without directory and extension
+    size: int
+        the width and height in pixels
+
+    Returns
+    -------
+    pygame.Surface:
+        the loaded image, itself if it already has the size
+    """
+    image = load_image(name)
+    if image.get_size() == (size, size):
+        return image
+    return pygame.transform.smoothscale(image, (size, size))
+
+
+class ImageAtlas:
+    """
+    A number of equally sized tiles packed side by side into one surface
+
+    Parameters
+    ----------
+    names: list of str
+        the names of the images to pack
+    size: int, optional
+        if given, the tiles are scaled to this width and height
+    """
+
+    def __init__(self, names, size=None):
+        if size is None:
+            tiles = [load_image(name) for name in names]
+        else:
+            tiles = [scaled_image(name, size) for name in names]
+        width = sum(tile.get_width() for tile in tiles)
+        height = max(tile.get_height() for tile in tiles)
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self._areas = {}
+        left = 0
+        for name, tile in zip(names, tiles):
+            self.surface.blit(tile, (left, 0))
+            self._areas[name] = pygame.Rect((left, 0), tile.get_size())
+            left += tile.get_width()
+
+    def area(self, name):
+        """
+        Return the region of an image in the atlas
+
+        Parameters
+        ----------
+        name: str
+            the name of the image
+
+        Returns
+        -------
+        pygame.Rect:
+            the region of the atlas surface
+        """
+        return self._areas[name]
+
+
+class TileRenderer:
+    """
+    Draws block images at grid positions, without creating actors
+
+    Parameters
+    ----------
+    block_size: int
+        the size of a block in pixels
+    names: list of str
+        the names of all images that will be drawn
+    atlas: bool, optional
+        if True, draw subregions of a single atlas surface
+    """
+
+    ghost_alpha = 80
+
+    def __init__(self, block_size, names, atlas=False):
+        self.block_size = block_size
+        self._names = names
+        self._use_atlas = atlas
+        self._atlas = None
+        self._ghosts = {}
+
+    def draw(self, surface, image, grid_pos):
+        """
+        Draw a block
+
+        Parameters
+        ----------
+        surface: pygame.Surface
+            the surface to draw on
+        image: str
+            the name of the image of the block
+        grid_pos: tuple of float
+            the column and line of the block, which may lie between two lines
+        """
+        pos = self._screen_pos(grid_pos)
+        if self._use_atlas:
+            if self._atlas is None:
+                self._atlas = ImageAtlas(self._names, self.block_size)
+            surface.blit(self._atlas.surface, pos, self._atlas.area(image))
+        else:
+            surface.blit(scaled_image(image, self.block_size), pos)
+
+    def draw_ghost(self, surface, image, grid_pos):
+        """
+        Draw a translucent block, the preview of a landing position
+
+        Parameters
+        ----------
+        surface: pygame.Surface
+            the surface to draw on
+        image: str
+            the name of the image of the block
+        grid_pos: tuple of int
+            the column and line of the block
+        """
+        ghost = self._ghosts.get(image)
+        if ghost is None:
+            ghost = scaled_image(image, self.block_size).copy()
+            self._ghosts[image] = ghost
+            ghost.set_alpha(self.ghost_alpha)
+        surface.blit(ghost, self._screen_pos(grid_pos))
+
+    def _screen_pos(self, grid_pos):
+        return (
+            round(grid_pos[0] * self.block_size),
+            round(grid_pos[1] * self.block_size),
+        )
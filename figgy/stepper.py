@@ -0,0 +1,153 @@
+"""
+A deterministic fixed-timestep driver of the game logic
+
+Instead of scheduling the tick on a clock and applying the inputs as soon as
+the keys are pressed, the inputs are queued and the logic is advanced in
+steps of a fixed duration. Every step first applies the queued inputs and then
+lets gravity advance by the duration of the step, ticking when the tick
+interval has elapsed. The number of steps only depends on the accumulated
+time, so the logic runs at the same rate whatever the frame rate, and a
+headless game can be advanced by any amount of time at once, faster than real
+time.
+"""
+from collections import deque
+
+from figgy.simulation import TICK
+
+
+class FixedStepper:
+    """
+    Advances the game logic in fixed steps, applying a queue of inputs
+
+    Parameters
+    ----------
+    apply: callable
+        called with an action code, for each queued input and each tick
+    tick_interval: callable
+        returns the current tick interval in seconds
+    timestep: float, optional
+        the duration of a step in seconds
+    max_delay: float, optional
+        if given, the time passed to `advance` is capped to this, so that a
+        stalled frame does not run a burst of steps
+    """
+
+    def __init__(self, apply, tick_interval, timestep=1.0 / 60, max_delay=None):
+        self.timestep = timestep
+        self.max_delay = max_delay
+        self.paused = False
+        self.steps = 0
+        self._apply = apply
+        self._tick_interval = tick_interval
+        self._queue = deque()
+        self._accumulator = 0.0
+        self._since_tick = 0  # Steps since the last tick or lock
+
+    @classmethod
+    def for_simulation(cls, sim, timestep=1.0 / 60):
+        """
+        Create a stepper that drives a headless simulation
+
+        Parameters
+        ----------
+        sim: figgy.simulation.Simulation
+            the game
+        timestep: float, optional
+            the duration of a step in seconds
+
+        Returns
+        -------
+        FixedStepper:
+            the stepper, its inputs are the action codes of `figgy.simulation`
+        """
+
+        def apply(code):
+            if not sim.is_running:
+                return
+            pieces = sim.pieces_placed
+            sim.apply(code)
+            if sim.pieces_placed != pieces:
+                stepper.reset_gravity()
+
+        stepper = cls(apply, lambda: sim.tick_interval, timestep)
+        return stepper
+
+    @property
+    def pending(self):
+        """ The number of queued inputs
+        """
+        return len(self._queue)
+
+    @property
+    def time(self):
+        """ The logic time in seconds, the number of steps times the timestep
+        """
+        return self.steps * self.timestep
+
+    def advance(self, dt):
+        """
+        Accumulate elapsed time and run the steps that fit in it
+
+        Parameters
+        ----------
+        dt: float
+            the elapsed time in seconds
+
+        Returns
+        -------
+        int:
+            the number of steps that were run
+        """
+        if self.max_delay is not None:
+            dt = min(dt, self.max_delay)
+        self._accumulator += dt
+        count = int(self._accumulator / self.timestep)
+        self._accumulator -= count * self.timestep
+        for _ in range(count):
+            self.step()
+        return count
+
+    def clear(self):
+        """ Drop the queued inputs, the leftover time and the gravity progress
+        """
+        self._queue.clear()
+        self._accumulator = 0.0
+        self._since_tick = 0
+
+    def push(self, code):
+        """
+        Queue an input, it is applied at the start of the next step
+
+        Parameters
+        ----------
+        code: int
+            the action code
+        """
+        self._queue.append(code)
+
+    def reset(self):
+        """ Start over, at logic time zero and not paused
+        """
+        self.clear()
+        self.steps = 0
+        self.paused = False
+
+    def reset_gravity(self):
+        """ Restart the tick interval, e.g. when a new piece spawns
+        """
+        self._since_tick = 0
+
+    def step(self):
+        """ Apply the queued inputs and advance gravity by one timestep
+        """
+        queue = self._queue
+        while queue:
+            self._apply(queue.popleft())
+        self.steps += 1
+        if self.paused:
+            return
+        self._since_tick += 1
+        # Counting steps instead of summing seconds keeps the ticks exact
+        if self._since_tick >= max(1, round(self._tick_interval() / self.timestep)):
+            self._since_tick = 0
+            self._apply(TICK)
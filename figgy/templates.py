@@ -0,0 +1,61 @@
+import json
+
+
+class TemplateSet:
+    """
+    A set of object templates with all their orientations precomputed
+
+    Each template is stored as four tuples of integer (x, y) offsets, one per
+    quarter turn about the anchor, so rotating a piece is a table lookup.
+    Completely symmetric templates, like the square box, are not rotated and
+    have the same offsets in all orientations.
+
+    Parameters
+    ----------
+    templates: list of list of dict
+        the templates, as a list of blocks with "x" and "y" offsets
+    """
+
+    def __init__(self, templates):
+        self.orientations = []
+        self.symmetric = []
+        for template in templates:
+            offsets = tuple((origo["x"], origo["y"]) for origo in template)
+            symmetric = self._is_completely_symmetric(offsets)
+            orientations = [offsets]
+            for _ in range(3):
+                if not symmetric:
+                    offsets = tuple((-y, x) for x, y in offsets)
+                orientations.append(offsets)
+            self.orientations.append(tuple(orientations))
+            self.symmetric.append(symmetric)
+
+    def __len__(self):
+        return len(self.orientations)
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Load a template set from a JSON file
+
+        Parameters
+        ----------
+        filename: str
+            the path to the file
+
+        Returns
+        -------
+        TemplateSet:
+            the loaded templates
+        """
+        with open(filename, "r") as fileobj:
+            return cls(json.load(fileobj))
+
+    @staticmethod
+    def _is_completely_symmetric(offsets):
+        midx = sum(x for x, _ in offsets) / float(len(offsets))
+        midy = sum(y for _, y in offsets) / float(len(offsets))
+        distances = [
+            (x - midx) * (x - midx) + (y - midy) * (y - midy) for x, y in offsets
+        ]
+        return all(dist - distances[0] == 0 for dist in distances)
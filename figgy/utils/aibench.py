@@ -0,0 +1,76 @@
+"""
+Measure how fast the computer player searches placements
+
+A headless game is played by `figgy.ai.AIPlayer` and the number of scored
+placements per second of wall time is reported.
+"""
+import random
+import time
+
+from figgy import resources
+from figgy.ai import AIPlayer
+from figgy.simulation import Simulation
+
+
+def benchmark(n_pieces=200, seed=0, lookahead=True):
+    """
+    Play a game with the computer player and time it
+
+    Parameters
+    ----------
+    n_pieces: int, optional
+        stop the game after this number of pieces has been placed
+    seed: int, optional
+        the seed of the game
+    lookahead: bool, optional
+        if True, the player also searches the placements of the next piece
+
+    Returns
+    -------
+    dict:
+        the number of placed pieces, completed lines, scored placements and
+        cache hits, the wall time and the placements per second
+    """
+    sim = Simulation(
+        resources.load_templates(), resources.image_names(), rng=random.Random(seed),
+    )
+    player = AIPlayer(lookahead=lookahead)
+    sim.start_game()
+    start = time.perf_counter()
+    while sim.is_running and sim.pieces_placed < n_pieces:
+        player.play(sim)
+    elapsed = time.perf_counter() - start
+    return {
+        "pieces": sim.pieces_placed,
+        "lines": sim.completed_lines,
+        "placements": player.evaluated,
+        "cache_hits": player.cache_hits,
+        "wall_time": elapsed,
+        "placements_per_second": player.evaluated / elapsed,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser("Benchmark the computer player of Figgy")
+    parser.add_argument("--pieces", type=int, default=200, help="number of pieces")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the game")
+    parser.add_argument(
+        "--no-lookahead", action="store_true", help="only search the current piece"
+    )
+    args = parser.parse_args()
+
+    stats = benchmark(args.pieces, args.seed, not args.no_lookahead)
+    print(
+        f"Placed {stats['pieces']} pieces and completed {stats['lines']} lines "
+        f"in {stats['wall_time']:.2f} s"
+    )
+    print(
+        f"{stats['placements_per_second']:.0f} placements/s "
+        f"({stats['placements']} placements, {stats['cache_hits']} cache hits)"
+    )
+
+
+if __name__ == "__main__":
+    main()
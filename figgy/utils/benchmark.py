@@ -0,0 +1,366 @@
+"""
+Time the hot paths of the game headless and save the results as JSON
+
+Each benchmark is a function that sets up a game state and returns the
+callable to time. The callables are timed with `timeit`, and the best and
+median time per call of a number of repeats are reported. A previous result
+file can be given as a baseline, in which case the benchmarks that became
+slower than a threshold are reported as regressions.
+"""
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from figgy import resources
+from figgy.ai import AIPlayer, placements
+from figgy.board import BitBoard, Board
+from figgy.env import FiggyBatchEnv, FiggyEnv
+from figgy.simulation import DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, TICK, Simulation
+from figgy.utils.selfplay import play_game
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """ Register a function that returns the callable to time
+    """
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _simulation(board_class=Board, seed=0):
+    sim = Simulation(
+        resources.load_templates(),
+        resources.image_names(),
+        board_class,
+        rng=random.Random(seed),
+    )
+    sim.start_game()
+    return sim
+
+
+def _fill(sim, lines, holes=0):
+    # Fill the bottom lines, leaving a number of holes in each of them
+    rng = random.Random(len(lines) + holes)
+    for line in lines:
+        cols = rng.sample(range(sim.scene_width), sim.scene_width - holes)
+        sim.board.add([(col, line) for col in cols], "pastel1_0")
+
+
+def _bottom(sim, n_lines):
+    return range(sim.scene_height - n_lines, sim.scene_height)
+
+
+def _setup_screen():
+    import pygame
+    from pgzero import game
+    from pgzero.loaders import set_root
+
+    import figgy
+    from figgy.game_logic import Block
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    game.screen = pygame.display.set_mode(
+        (
+            Simulation.scene_width * Block.block_size,
+            Simulation.scene_height * Block.block_size,
+        )
+    )
+    set_root(os.path.dirname(os.path.abspath(figgy.__file__)))
+
+
+@benchmark
+def piece_can_fall():
+    sim = _simulation()
+    _fill(sim, _bottom(sim, 10), holes=2)
+    return lambda: sim.current._can_fall(sim.board)
+
+
+@benchmark
+def piece_rotate():
+    sim = _simulation()
+    _fill(sim, _bottom(sim, 10), holes=2)
+    return lambda: sim.current.rotate(sim.board)
+
+
+@benchmark
+def piece_drop_distance():
+    sim = _simulation()
+    _fill(sim, _bottom(sim, 10), holes=2)
+    return lambda: sim.current.drop_distance(sim.board)
+
+
+@benchmark
+def new_piece():
+    sim = _simulation()
+    return sim.new_piece
+
+
+def _check_lines(board_class, holes):
+    sim = _simulation(board_class)
+    _fill(sim, _bottom(sim, 4), holes=holes)
+    _fill(sim, _bottom(sim, 12)[:8], holes=3)
+    state = sim.board.snapshot()
+    lines = list(_bottom(sim, 4))
+
+    def run():
+        sim.board.restore(state)
+        sim.check_lines(lines)
+
+    return run
+
+
+@benchmark
+def check_lines_full():
+    """ Restore a board with four full lines and remove them
+    """
+    return _check_lines(Board, holes=0)
+
+
+@benchmark
+def check_lines_near_full():
+    """ Restore a board with four lines with a single hole and check them
+    """
+    return _check_lines(Board, holes=1)
+
+
+@benchmark
+def check_lines_full_bitboard():
+    return _check_lines(BitBoard, holes=0)
+
+
+@benchmark
+def check_lines_near_full_bitboard():
+    return _check_lines(BitBoard, holes=1)
+
+
+def _engine_draw(method, present=False):
+    import pygame
+
+    from figgy.game_logic import Engine
+
+    class _Clock:
+        def schedule_interval(self, callback, delay):
+            pass
+
+        def unschedule(self, callback):
+            pass
+
+    _setup_screen()
+    engine = Engine(_Clock(), rng=random.Random(0))
+    engine.start_game()
+    _fill(engine.simulation, _bottom(engine.simulation, 10), holes=2)
+    inputs = [engine.move_left, engine.move_right]
+    rng = random.Random(0)
+
+    def run():
+        rng.choice(inputs)()
+        rects = getattr(engine, method)()
+        if present:
+            # As figgy.main.present, only the dirty regions are updated
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+
+    return run
+
+
+@benchmark
+def engine_draw():
+    return _engine_draw("draw")
+
+
+@benchmark
+def engine_draw_dirty():
+    return _engine_draw("draw_dirty")
+
+
+@benchmark
+def engine_frame():
+    """ Draw the whole scene and flip the whole display
+    """
+    return _engine_draw("draw", present=True)
+
+
+@benchmark
+def engine_frame_dirty():
+    """ Draw the dirty cells and update only their regions of the display
+    """
+    return _engine_draw("draw_dirty", present=True)
+
+
+@benchmark
+def ai_placements():
+    sim = _simulation()
+    _fill(sim, _bottom(sim, 6), holes=2)
+    return lambda: placements(sim.board, sim.current)
+
+
+@benchmark
+def ai_choose():
+    sim = _simulation()
+    _fill(sim, _bottom(sim, 6), holes=2)
+    player = AIPlayer(cache_size=0)
+    return lambda: player.choose(sim)
+
+
+@benchmark
+def env_step():
+    env = FiggyEnv(seed=0)
+    env.reset()
+    actions = itertools.cycle([TICK, MOVE_LEFT, ROTATE, MOVE_RIGHT, TICK, DROP])
+
+    def run():
+        if env.step(next(actions))[2]:
+            env.reset()
+
+    return run
+
+
+@benchmark
+def batch_env_step_1024():
+    """ One step of 1024 games, divide by 1024 for the time per game step
+    """
+    env = FiggyBatchEnv(1024, seed=0)
+    env.reset()
+    actions = np.random.default_rng(0).choice(FiggyBatchEnv.actions, size=(64, 1024))
+    steps = itertools.cycle(actions)
+    return lambda: env.step(next(steps))
+
+
+@benchmark
+def selfplay_game():
+    seeds = iter(range(sys.maxsize))
+    return lambda: play_game(next(seeds))
+
+
+@benchmark
+def cold_start():
+    """ Launch the game in a new process and quit after the first frame
+    """
+    import figgy
+
+    # Import the same package in the new process
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(figgy.__file__)))
+    path = os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+    env = dict(
+        os.environ, PYTHONPATH=path, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy"
+    )
+    command = [sys.executable, "-m", "figgy.utils.runner", "--frames", "1"]
+    return lambda: subprocess.run(
+        command, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+
+
+def run(names=None, repeat=5):
+    """
+    Run a number of benchmarks
+
+    Parameters
+    ----------
+    names: list of str, optional
+        the names of the benchmarks, by default all of them
+    repeat: int, optional
+        the number of timings of each benchmark
+
+    Returns
+    -------
+    dict:
+        the best and median seconds per call and the number of calls per
+        timing, for each benchmark
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        timer = timeit.Timer(BENCHMARKS[name]())
+        number, _ = timer.autorange()
+        timings = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+        results[name] = {
+            "best": min(timings),
+            "median": statistics.median(timings),
+            "number": number,
+        }
+    return results
+
+
+def regressions(results, baseline, threshold=1.2):
+    """
+    Find the benchmarks that became slower than a baseline
+
+    Parameters
+    ----------
+    results: dict
+        the results of `run`
+    baseline: dict
+        earlier results of `run`
+    threshold: float, optional
+        the ratio of the best times above which a benchmark has regressed
+
+    Returns
+    -------
+    dict:
+        the ratio of the best times, for each regressed benchmark
+    """
+    ratios = {
+        name: result["best"] / baseline[name]["best"]
+        for name, result in results.items()
+        if name in baseline
+    }
+    return {name: ratio for name, ratio in ratios.items() if ratio > threshold}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser("Benchmark the hot paths of Figgy")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, default all")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio to report"
+    )
+    args = parser.parse_args()
+
+    results = run(args.names, args.repeat)
+    for name, result in results.items():
+        per_second = 1.0 / result["best"]
+        print(
+            f"{name:32s} {result['best'] * 1e6:12.2f} us/call {per_second:14.1f} calls/s"
+        )
+
+    if args.output:
+        with open(args.output, "w") as fileobj:
+            json.dump(
+                {
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                fileobj,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline, "r") as fileobj:
+            baseline = json.load(fileobj)["results"]
+        slower = regressions(results, baseline, args.threshold)
+        for name, ratio in slower.items():
+            print(f"Regression: {name} is {ratio:.2f} times slower")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,232 @@
+"""
+Create the block images of the game
+
+The tiles of any number of colours are built at once as a single NumPy array
+of shape (N, size, size, 3) and written directly as PNG files, or packed side
+by side into one atlas image with a JSON index. Colour maps and block sizes
+are generated in parallel processes. matplotlib is only needed to look up
+colour maps by name.
+"""
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-import matplotlib.pylab as plt
 import numpy as np
+import pygame
 
 from figgy.game_logic import Block
 
+IMAGES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images"
+)
+
+
+def colormap_colors(name, n_colors=None):
+    """
+    Return the colours of a matplotlib colour map
+
+    Parameters
+    ----------
+    name: str
+        the name of the colour map
+    n_colors: int, optional
+        the number of colours to sample from a continuous colour map, by
+        default the colours of a listed colour map
+
+    Returns
+    -------
+    numpy.ndarray:
+        the RGB colours in ranges from 0 to 1, of shape (N, 3)
+    """
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ImportError("matplotlib is needed to create images from a colour map")
+
+    cmap = plt.get_cmap(name)
+    if n_colors is None:
+        if not hasattr(cmap, "colors"):
+            raise ValueError(
+                f"Colour map {name} is continuous, give a number of colors"
+            )
+        return np.asarray(cmap.colors, dtype=float)[:, :3]
+    return cmap(np.linspace(0.0, 1.0, n_colors))[:, :3]
+
+
+def tiles(colors, size=Block.block_size):
+    """
+    Build the block tiles of a number of colours
+
+    Each tile has a grey border, a ring of a light version of the colour and
+    is filled with the colour.
+
+    Parameters
+    ----------
+    colors: array_like
+        the RGB colours in ranges from 0 to 1, of shape (N, 3)
+    size: int, optional
+        the size of a tile in pixels
+
+    Returns
+    -------
+    numpy.ndarray:
+        the tiles, of shape (N, size, size, 3) and type uint8
+    """
+    colors = np.asarray(colors, dtype=float).reshape(-1, 3)[:, None, None, :]
+    mat = np.empty((len(colors), size, size, 3))
+    mat[:] = 0.7
+    mat[:, 1:-1, 1:-1] = 1.0 - colors / 2
+    mat[:, 2:-2, 2:-2] = colors
+    return (mat * 255).astype(np.uint8)
+
+
+def write_atlas(images, names, path):
+    """
+    Write tiles side by side into one image, and their regions to a JSON file
+
+    Parameters
+    ----------
+    images: numpy.ndarray
+        the tiles, of shape (N, size, size, 3)
+    names: list of str
+        the name of each tile
+    path: str
+        the path to the atlas image, the index is written next to it with
+        the .json extension
+    """
+    n_tiles, size = images.shape[:2]
+    strip = images.transpose(1, 0, 2, 3).reshape(size, n_tiles * size, 3)
+    _save(strip, path)
+    index = {
+        "size": size,
+        "tiles": {name: [idx * size, 0, size, size] for idx, name in enumerate(names)},
+    }
+    with open(os.path.splitext(path)[0] + ".json", "w") as fileobj:
+        json.dump(index, fileobj, indent=2)
+
+
+def write_images(images, names, directory):
+    """
+    Write every tile to its own PNG file
+
+    Parameters
+    ----------
+    images: numpy.ndarray
+        the tiles, of shape (N, size, size, 3)
+    names: list of str
+        the name of each tile, the file name without extension
+    directory: str
+        the directory of the files
+    """
+    for image, name in zip(images, names):
+        _save(image, os.path.join(directory, f"{name}.png"))
+
+
+def generate(colors, prefix, size, output, atlas=False):
+    """
+    Create the tiles of a number of colours at one size and write them
+
+    Parameters
+    ----------
+    colors: array_like
+        the RGB colours in ranges from 0 to 1, of shape (N, 3)
+    prefix: str
+        the tiles are named prefix_0, prefix_1 and so on
+    size: int
+        the size of a tile in pixels
+    output: str
+        the directory to write to, tiles that are not of the size of the game
+        are written to a subdirectory named after the size
+    atlas: bool, optional
+        if True, write one atlas image and its index instead of one file per tile
+
+    Returns
+    -------
+    list of str:
+        the paths of the written images
+    """
+    output = _size_directory(output, size)
+    images = tiles(colors, size)
+    names = [f"{prefix}_{idx}" for idx in range(len(images))]
+    if atlas:
+        path = os.path.join(output, f"{prefix}_atlas.png")
+        write_atlas(images, names, path)
+        return [path]
+    write_images(images, names, output)
+    return [os.path.join(output, f"{name}.png") for name in names]
 
-def main(color, name):
-    color = np.asarray(color)
-    alt_color = np.ones(3) - color / 2
-    fig = plt.figure(figsize=(Block.block_size, Block.block_size), dpi=1)
-    mat = np.zeros((Block.block_size, Block.block_size, 3))
-    mat[:, :] = [0.7, 0.7, 0.7]
-    mat[1:-1, 1:-1] = alt_color
-    mat[2:-2, 2:-2] = color
-    fig.gca().axis("off")
-    fig.gca().imshow(mat, extent=(0, Block.block_size, 0, Block.block_size))
-    fig.tight_layout()
-    this_path = os.path.dirname(os.path.abspath(__file__))
-    fig.savefig(os.path.join(this_path, "..", "images", f"{name}.png"), pad_inches=0)
+
+def main(color, name, size=Block.block_size, output=IMAGES_PATH):
+    """
+    Create the image of a single colour
+
+    Parameters
+    ----------
+    color: list of float
+        the RGB colour in ranges from 0 to 1
+    name: str
+        the name of the image
+    size: int, optional
+        the size of the image in pixels
+    output: str, optional
+        the directory to write to, by default the images of the game
+    """
+    write_images(tiles([color], size), [name], _size_directory(output, size))
+
+
+def batch(colormaps, sizes, output=None, atlas=False, n_colors=None, jobs=None):
+    """
+    Create the images of a number of colour maps at a number of sizes
+
+    Every colour map and size is generated by its own process.
+
+    Parameters
+    ----------
+    colormaps: list of str
+        the names of the matplotlib colour maps
+    sizes: list of int
+        the sizes of the tiles in pixels
+    output: str, optional
+        the directory to write to, by default the images of the game, or the
+        current directory for atlases, so that they are not taken for blocks
+    atlas: bool, optional
+        if True, write one atlas image per colour map and size
+    n_colors: int, optional
+        the number of colours to sample from continuous colour maps
+    jobs: int, optional
+        the number of processes, by default the number of CPUs
+
+    Returns
+    -------
+    list of str:
+        the paths of the written images
+    """
+    output = output or (os.getcwd() if atlas else IMAGES_PATH)
+    colors = {name: colormap_colors(name, n_colors) for name in colormaps}
+    work = [
+        (colors[name], name.lower(), size, output, atlas)
+        for name in colormaps
+        for size in sizes
+    ]
+    if len(work) == 1 or jobs == 1:
+        results = [generate(*args) for args in work]
+    else:
+        with ProcessPoolExecutor(jobs) as executor:
+            results = list(executor.map(generate, *zip(*work)))
+    return [path for paths in results for path in paths]
+
+
+def _size_directory(output, size):
+    # Tiles that are not of the size of the game go to their own directory
+    if size != Block.block_size:
+        output = os.path.join(output, f"{size}px")
+    os.makedirs(output, exist_ok=True)
+    return output
+
+
+def _save(image, path):
+    # pygame surfaces are indexed by column first
+    pygame.image.save(pygame.surfarray.make_surface(image.swapaxes(0, 1)), path)
 
 
 if __name__ == "__main__":
@@ -35,13 +243,33 @@ if __name__ == "__main__":
     parser.add_argument(
         "--name", default="unnamed", help="Specify the name of the image"
     )
-    parser.add_argument("--colormap", help="Produce images from a color map")
+    parser.add_argument(
+        "--colormap", nargs="+", help="Produce images from one or more color maps"
+    )
+    parser.add_argument(
+        "--ncolors", type=int, help="Number of colors to take from a continuous map"
+    )
+    parser.add_argument(
+        "--size",
+        nargs="+",
+        type=int,
+        default=[Block.block_size],
+        help="Sizes of the images in pixels",
+    )
+    parser.add_argument(
+        "--atlas",
+        action="store_true",
+        help="Write a single atlas image and JSON index per color map and size",
+    )
+    parser.add_argument("--output", help="Directory to write the images to")
+    parser.add_argument("--jobs", type=int, help="Number of parallel processes")
     args = parser.parse_args()
 
     if args.colormap:
-        cmap = plt.get_cmap(args.colormap)
-        for i, color in enumerate(cmap.colors):
-            name = f"{args.colormap.lower()}_{i}"
-            main(color=list(color), name=name)
+        paths = batch(
+            args.colormap, args.size, args.output, args.atlas, args.ncolors, args.jobs,
+        )
+        print(f"Wrote {len(paths)} images")
     else:
-        main(color=args.color, name=args.name)
+        for size in args.size:
+            main(args.color, args.name, size, args.output or IMAGES_PATH)
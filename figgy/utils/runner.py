@@ -1,11 +1,121 @@
+import argparse
 import os
-import subprocess
+import sys
+import time
+from types import ModuleType
+
+
+def launch(max_frames=None):
+    """
+    Run the game in this process, through the runner API of pgzero
+
+    Parameters
+    ----------
+    max_frames: int, optional
+        if given, quit after this number of frames have been drawn and print
+        the time since the launch
+    """
+    start = time.perf_counter()
+    from pgzero.runner import prepare_mod  # Initialises pygame
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+    with open(path) as fileobj:
+        code = compile(fileobj.read(), path, 'exec', dont_inherit=True)
+    mod = ModuleType('main')
+    mod.__file__ = path
+    sys.modules['main'] = mod
+    sys._pgzrun = True  # Disables the pgzrun module, as pgzrun does
+
+    prepare_mod(mod)
+    exec(code, mod.__dict__)
+    if max_frames:
+        if not hasattr(mod, 'update'):
+            # pgzero only redraws on events and clock callbacks, unless there is an update hook
+            mod.update = lambda: None
+        draw = mod.draw
+        frames = [0]
+
+        def counted_draw():
+            rects = draw()
+            frames[0] += 1
+            if frames[0] >= max_frames:
+                print(f"{frames[0]} frames drawn in {time.perf_counter() - start:.3f} s")
+                sys.exit(0)
+            return rects
+
+        mod.draw = counted_draw
+    _run_mod(mod)
+
+
+def _run_mod(mod):
+    """
+    Run a module as the runner API of pgzero does, but let it update parts of the display
+
+    If the module has a `present` function, it is called with the return value of `draw`,
+    e.g. the dirty rectangles, instead of flipping the whole display after every frame.
+    """
+    import pygame
+    import pgzero.clock
+    from pgzero.game import PGZeroGame
+
+    present = getattr(mod, 'present', None)
+    if present is None:
+        PGZeroGame(mod).run()
+        return
+
+    class Game(PGZeroGame):
+        def mainloop(self):
+            # The main loop of PGZeroGame, except for the display update
+            clock = pygame.time.Clock()
+            self.reinit_screen()
+            update = self.get_update_func()
+            draw = self.get_draw_func()
+            self.load_handlers()
+            pgzclock = pgzero.clock.clock
+
+            self.need_redraw = True
+            while True:
+                dt = clock.tick(60) / 1000.0
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_q and event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META):
+                            sys.exit(0)
+                        self.keyboard._press(event.key)
+                    elif event.type == pygame.KEYUP:
+                        self.keyboard._release(event.key)
+                    self.dispatch_event(event)
+
+                pgzclock.tick(dt)
+                if update:
+                    update(dt)
+
+                screen_change = self.reinit_screen()
+                if screen_change or update or pgzclock.fired or self.need_redraw:
+                    rects = draw()
+                    present(None if screen_change else rects)
+                    self.need_redraw = False
+
+    Game(mod).run()
 
 
 def main():
-    figgy_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'main.py')
-    subprocess.call(f"pgzrun {figgy_path}", shell=True)
+    parser = argparse.ArgumentParser('Play Figgy')
+    parser.add_argument('--profile', metavar='FILE', help='write timings of the game to this JSON file on exit')
+    parser.add_argument('--profile-overlay', action='store_true', help='show the timings on the screen')
+    parser.add_argument('--fixed-step', action='store_true', help='advance the logic in fixed steps from the frame updates')
+    parser.add_argument('--frames', type=int, help='quit after this number of frames, to time the startup')
+    args = parser.parse_args()
+
+    if args.profile:
+        os.environ['FIGGY_PROFILE'] = os.path.abspath(args.profile)
+    if args.profile_overlay:
+        os.environ['FIGGY_PROFILE_OVERLAY'] = '1'
+    if args.fixed_step:
+        os.environ['FIGGY_FIXED_STEP'] = '1'
+    launch(args.frames)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
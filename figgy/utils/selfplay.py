@@ -0,0 +1,125 @@
+"""
+Run headless self-play games in parallel on a process pool
+
+Every game gets its own seed, which is used for a random generator injected
+into the piece generation of the simulation, so that each game can be
+reproduced from its seed alone.
+"""
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from figgy import resources
+from figgy.simulation import Simulation
+
+
+def random_policy(sim, rng):
+    """
+    Play the falling piece with random rotations and moves, then drop it
+
+    Parameters
+    ----------
+    sim: figgy.simulation.Simulation
+        the simulation to play
+    rng: random.Random
+        the random generator of the policy
+    """
+    for _ in range(rng.randrange(4)):
+        sim.rotate()
+    move = sim.move_left if rng.random() < 0.5 else sim.move_right
+    for _ in range(rng.randrange(sim.scene_width // 2 + 1)):
+        move()
+    sim.drop()
+
+
+def play_game(seed, max_pieces=None, policy=random_policy):
+    """
+    Play a single headless game
+
+    Parameters
+    ----------
+    seed: int
+        the seed of the game
+    max_pieces: int, optional
+        stop the game after this number of pieces has been placed
+    policy: callable, optional
+        a function taking the simulation and a random generator that plays
+        the current piece
+
+    Returns
+    -------
+    dict:
+        the seed, the number of completed lines, the number of placed pieces
+        and the wall time of the game
+    """
+    start = time.perf_counter()
+    sim = Simulation(
+        resources.load_templates(), resources.image_names(), rng=random.Random(seed),
+    )
+    policy_rng = random.Random(f"policy-{seed}")
+    sim.start_game()
+    while sim.is_running and (max_pieces is None or sim.pieces_placed < max_pieces):
+        policy(sim, policy_rng)
+    return {
+        "seed": seed,
+        "lines": sim.completed_lines,
+        "pieces": sim.pieces_placed,
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def run(n_games, seed=0, workers=None, max_pieces=None):
+    """
+    Play a number of games on a process pool
+
+    Parameters
+    ----------
+    n_games: int
+        the number of games to play
+    seed: int, optional
+        the seed of the first game, game i is played with seed + i
+    workers: int, optional
+        the number of worker processes, by default the number of cores
+    max_pieces: int, optional
+        stop each game after this number of pieces has been placed
+
+    Returns
+    -------
+    list of dict:
+        the statistics of each game, in the order of the seeds
+    """
+    seeds = range(seed, seed + n_games)
+    workers = workers or os.cpu_count()
+    chunksize = max(1, n_games // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(play_game, seeds, [max_pieces] * n_games, chunksize=chunksize)
+        )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser("Run headless self-play games of Figgy")
+    parser.add_argument("--games", type=int, default=100, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument(
+        "--max-pieces", type=int, help="maximum number of pieces in each game"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = run(args.games, args.seed, args.workers, args.max_pieces)
+    elapsed = time.perf_counter() - start
+
+    lines = sum(game["lines"] for game in stats)
+    pieces = sum(game["pieces"] for game in stats)
+    print(f"Played {len(stats)} games in {elapsed:.2f} s")
+    print(f"{len(stats) / elapsed:.1f} games/s, {pieces / elapsed:.1f} pieces/s")
+    print(f"Completed lines: {lines}, placed pieces: {pieces}")
+
+
+if __name__ == "__main__":
+    main()
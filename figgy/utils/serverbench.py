@@ -0,0 +1,113 @@
+"""
+Load test the game server on localhost
+
+A number of bot players connect to a `figgy.server.GameServer` in the same
+event loop and send random inputs, restarting their games when they end. The
+time the server spends stepping the sessions and writing the deltas is used to
+estimate how many sessions a single core can host, and the 99th percentile of
+the tick latency is reported. As the bots run in the same event loop, the
+latency is an upper bound of the one of a dedicated server.
+"""
+import asyncio
+import random
+
+from figgy.server import INPUTS, GameServer, encode
+
+
+async def _bot(host, port, seed, stop):
+    # The deltas are not parsed, so that the bots load the loop little
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "join", "seed": seed}))
+    rng = random.Random(seed)
+
+    async def send():
+        while not stop.is_set():
+            await asyncio.sleep(rng.uniform(0.05, 0.3))
+            writer.write(encode({"type": "input", "action": rng.choice(INPUTS)}))
+
+    sender = asyncio.ensure_future(send())
+    try:
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            if b'"over":true' in line:
+                writer.write(encode({"type": "start"}))
+    finally:
+        sender.cancel()
+        writer.close()
+
+
+async def _load(n_sessions, duration, timestep):
+    server = GameServer(timestep=timestep)
+    await server.start()
+    stop = asyncio.Event()
+    bots = [
+        asyncio.ensure_future(_bot("127.0.0.1", server.port, seed, stop))
+        for seed in range(n_sessions)
+    ]
+    await asyncio.sleep(duration)
+    stop.set()
+    await server.close()
+    await asyncio.gather(*bots, return_exceptions=True)
+    return server.profiler
+
+
+def benchmark(n_sessions=100, duration=5.0, timestep=1.0 / 60):
+    """
+    Run a number of bot players against a server
+
+    Parameters
+    ----------
+    n_sessions: int, optional
+        the number of players
+    duration: float, optional
+        the wall time of the test in seconds
+    timestep: float, optional
+        the duration of a step of the server
+
+    Returns
+    -------
+    dict:
+        the number of sessions and steps, the fraction of the wall time the
+        server was busy, the estimated sessions per core, and the mean and
+        99th percentile tick latency in milliseconds
+    """
+    profiler = asyncio.run(_load(n_sessions, duration, timestep))
+    stats = profiler.summary()
+    busy = stats["tick_busy"]["mean_ms"] / (1000 * timestep)
+    return {
+        "sessions": n_sessions,
+        "steps": stats["tick_busy"]["calls"],
+        "busy": busy,
+        "sessions_per_core": n_sessions / busy,
+        "latency_mean_ms": stats["tick_latency"]["mean_ms"],
+        "latency_p99_ms": stats["tick_latency"]["p99_ms"],
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser("Load test the Figgy game server")
+    parser.add_argument("--sessions", type=int, default=100, help="number of bots")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run")
+    parser.add_argument(
+        "--rate", type=float, default=60.0, help="steps per second of the server"
+    )
+    args = parser.parse_args()
+
+    stats = benchmark(args.sessions, args.duration, 1.0 / args.rate)
+    print(
+        f"{stats['sessions']} sessions, {stats['steps']} steps, "
+        f"server busy {100 * stats['busy']:.1f}% of the time"
+    )
+    print(f"~{stats['sessions_per_core']:.0f} sessions per core")
+    print(
+        f"Tick latency: {stats['latency_mean_ms']:.3f} ms mean, "
+        f"{stats['latency_p99_ms']:.3f} ms p99"
+    )
+
+
+if __name__ == "__main__":
+    main()
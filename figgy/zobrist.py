@@ -0,0 +1,67 @@
+"""
+Zobrist hashing of game states
+
+Every filled cell of a board and every property of a falling piece has a
+random 64-bit key, and the hash of a state is the XOR of the keys of its parts.
+A board updates its hash when cells are added or move, so a state key costs
+O(changed cells) to maintain and O(1) to read. The keys are drawn from
+generators with fixed seeds, so hashes are the same in every process.
+"""
+import functools
+import random
+
+
+@functools.lru_cache(maxsize=None)
+def cell_keys(width, height):
+    """
+    Return the keys of the cells of a board
+
+    Parameters
+    ----------
+    width: int
+        the number of columns of the board
+    height: int
+        the number of lines of the board
+
+    Returns
+    -------
+    tuple of tuple of int:
+        the key of each cell, indexed by line and then column
+    """
+    rng = random.Random(f"cells-{width}x{height}")
+    return tuple(
+        tuple(rng.getrandbits(64) for _ in range(width)) for _ in range(height)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _key(*parts):
+    return random.Random(repr(parts)).getrandbits(64)
+
+
+def piece_hash(template, rotation, anchor, fallen):
+    """
+    Return the hash of a falling piece
+
+    Parameters
+    ----------
+    template: int
+        the index of the template of the piece
+    rotation: int
+        the orientation of the piece
+    anchor: tuple of int
+        the column and line of the anchor of the piece
+    fallen: bool
+        if the piece has moved downwards since it was spawned
+
+    Returns
+    -------
+    int:
+        the 64-bit hash
+    """
+    return (
+        _key("piece", template, rotation)
+        ^ _key("column", anchor[0])
+        ^ _key("line", anchor[1])
+        ^ _key("fallen", fallen)
+    )
@@ -14,6 +14,7 @@ setup (
     package_data= {
         "": ["*.png", "*.json"]
     },
-    install_requires=['pgzero', 'matplotlib', 'black',],
+    install_requires=['pgzero', 'numpy', 'black',],
+    extras_require={'colormaps': ['matplotlib']},
     entry_points={'console_scripts': ['figgy = figgy.utils.runner:main', ]},
 )
\ No newline at end of file
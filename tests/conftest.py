@@ -2,6 +2,7 @@ import os
 
 import pytest
 import pygame
+from pgzero import game
 from pgzero.loaders import set_root
 
 import figgy
@@ -12,9 +13,22 @@ from figgy.game_logic import Block, Engine
 def pygame_setup():
     os.environ["SDL_VIDEODRIVER"] = "dummy"
     pygame.init()
-    pygame.display.set_mode(
+    game.screen = pygame.display.set_mode(
         (Block.block_size * Engine.scene_width, Block.block_size * Engine.scene_height)
     )
     set_root(os.path.dirname(os.path.abspath(figgy.__file__)))
     yield None
     pygame.display.quit()
+
+
+class FakeClock:
+    def schedule_interval(self, callback, delay):
+        pass
+
+    def unschedule(self, callback):
+        pass
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+from figgy import resources
+from figgy.ai import AIPlayer, evaluate, placements
+from figgy.board import Board
+from figgy.game_logic import Engine
+from figgy.simulation import DROP, Piece, Simulation
+from figgy.templates import TemplateSet
+
+SQUARE = [{"x": 0, "y": 1}, {"x": 1, "y": 1}, {"x": 0, "y": 0}, {"x": 1, "y": 0}]
+I_SHAPE = [{"x": 0, "y": 2}, {"x": 0, "y": 1}, {"x": 0, "y": 0}, {"x": 0, "y": -1}]
+
+
+def test_placements_on_empty_board():
+    templates = TemplateSet([SQUARE, I_SHAPE])
+    board = Board(12, 25)
+
+    square = placements(board, Piece(templates, 0, "x", 12, 25))
+    stick = placements(board, Piece(templates, 1, "x", 12, 25))
+
+    assert len(square) == 11
+    assert len(stick) == 12 + 9
+    assert all(max(line for _, line in p.cells) == 24 for p in square + stick)
+
+
+def test_placements_can_be_played():
+    sim = Simulation(resources.load_templates(), ["pastel1_0"], rng=random.Random(2))
+    sim.start_game()
+    sim.board.add([(col, 24) for col in range(0, 12, 3)], "pastel1_0")
+
+    for placement in placements(sim.board, sim.current):
+        state = sim.snapshot()
+        current = sim.current
+        for _ in range(placement.rotations):
+            sim.rotate()
+        move = sim.move_left if placement.shift < 0 else sim.move_right
+        for _ in range(abs(placement.shift)):
+            move()
+        sim.land()
+
+        assert tuple(sorted(current.cells())) == placement.cells
+        sim.restore(state)
+
+
+def test_evaluate_clears_lines():
+    board = Board(4, 5)
+    board.add([(0, 4), (1, 4), (0, 3)], "x")
+
+    profile, lines = evaluate(board, [(2, 4), (3, 4), (2, 3), (3, 3)])
+
+    assert lines == 1
+    assert profile.heights == (1, 0, 1, 1)
+    assert profile.holes == (0, 0, 0, 0)
+
+
+def test_evaluate_top_in_cleared_line_above_a_hole():
+    board = Board(2, 4)
+    board.add([(0, 3), (1, 3), (1, 2), (1, 1)], "x")
+
+    profile, lines = evaluate(board, [(0, 1)])
+
+    assert lines == 1
+    assert profile.heights == (1, 2)
+    assert profile.holes == (0, 0)
+
+
+def test_evaluate_matches_clearing_the_board():
+    rng = random.Random(0)
+    for _ in range(200):
+        board = Board(4, 6)
+        board.add([pos for pos in _grid(4, 6) if rng.random() < 0.6], "x")
+        if any(board.is_line_full(line) for line in range(6)):
+            continue
+        empty = [pos for pos in _grid(4, 6) if pos not in board]
+        cells = rng.sample(empty, min(len(empty), 3))
+
+        profile, lines = evaluate(board, cells)
+
+        board.add(cells, "x")
+        full = [line for line in range(6) if board.is_line_full(line)]
+        board.remove_lines(full)
+        assert lines == len(full)
+        assert profile.heights == board.column_heights()
+        assert profile.holes == board.column_holes()
+
+
+def _grid(width, height):
+    return [(col, line) for col in range(width) for line in range(height)]
+
+
+@pytest.mark.parametrize("lookahead", [False, True])
+def test_ai_clears_lines(lookahead):
+    sim = Simulation(
+        resources.load_templates(), resources.image_names(), rng=random.Random(1)
+    )
+    sim.start_game()
+    player = AIPlayer(lookahead=lookahead)
+
+    while sim.is_running and sim.pieces_placed < 40:
+        player.play(sim)
+
+    assert sim.pieces_placed == 40
+    assert sim.completed_lines >= 10
+    assert player.evaluated > 0
+
+
+def test_cache_is_used_for_repeated_positions():
+    sim = Simulation(
+        resources.load_templates(), resources.image_names(), rng=random.Random(1)
+    )
+    sim.start_game()
+    player = AIPlayer()
+
+    first = player.choose(sim)
+    evaluated = player.evaluated
+    assert player.choose(sim) == first
+    assert player.evaluated == evaluated
+    assert player.cache_hits == 1
+
+
+def test_ai_plays_through_engine(pygame_setup, fake_clock):
+    engine = Engine(fake_clock, rng=random.Random(0))
+    engine.start_game()
+    player = AIPlayer(lookahead=False)
+
+    for _ in range(10):
+        player.play(engine)
+
+    assert engine.simulation.pieces_placed == 10
+    assert engine.replay_log.codes.count(DROP) == 10
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+import figgy
+from figgy.batch import BatchEngine, DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, TICK
+from figgy.simulation import Piece, Simulation, spawn_position
+from figgy.templates import TemplateSet
+
+
+class ScriptedSimulation(Simulation):
+    """ A simulation that spawns a given sequence of templates
+    """
+
+    def __init__(self, object_templates, sequence):
+        super().__init__(object_templates, ["pastel1_0"])
+        self._sequence = iter(sequence)
+
+    def new_piece(self):
+        self.current = Piece(
+            self._object_templates,
+            next(self._sequence),
+            "pastel1_0",
+            self.scene_width,
+            self.scene_height,
+        )
+
+
+@pytest.fixture
+def templates():
+    filename = os.path.join(os.path.dirname(figgy.__file__), "templates.json")
+    return TemplateSet.from_file(filename)
+
+
+def _board_array(sim):
+    array = np.zeros((sim.scene_height, sim.scene_width), dtype=bool)
+    for (col, line), _ in sim.board.items():
+        array[line, col] = True
+    return array
+
+
+def test_start_game(templates):
+    batch = BatchEngine(templates, 3, seed=0)
+
+    batch.start_game()
+
+    assert batch.is_running.all()
+    assert not batch.boards.any()
+    assert (batch.anchors == spawn_position(batch.scene_width)).all()
+
+
+def test_drop_locks_pieces(templates):
+    batch = BatchEngine(templates, 2, seed=0)
+    batch.start_game()
+
+    locked = batch.step([DROP, TICK])
+
+    assert locked.tolist() == [True, False]
+    assert batch.boards[0].sum() == 4
+    assert batch.boards[0, -1].any()
+    assert not batch.boards[1].any()
+
+
+@pytest.mark.parametrize("prefilled_lines", [0, 12])
+def test_matches_sequential_simulations(templates, prefilled_lines):
+    n_games = 16
+    rng = np.random.default_rng(3)
+    actions = rng.choice(
+        [TICK, TICK, MOVE_LEFT, MOVE_RIGHT, ROTATE, DROP], size=(400, n_games)
+    )
+    # Lines with a hole below the spawn position, so that pieces complete lines
+    prefill = np.ones((n_games, prefilled_lines, BatchEngine.scene_width), bool)
+    prefill[:, :, spawn_position(BatchEngine.scene_width)[0]] = False
+
+    batch = BatchEngine(templates, n_games, seed=5)
+    batch.start_game()
+    batch.boards[:, batch.scene_height - prefilled_lines :] = prefill
+    sequences = [[template] for template in batch.templates]
+    for step_actions in actions:
+        locked = batch.step(step_actions)
+        for game in np.flatnonzero(locked & batch.is_running):
+            sequences[game].append(batch.templates[game])
+
+    methods = {
+        TICK: "tick",
+        MOVE_LEFT: "move_left",
+        MOVE_RIGHT: "move_right",
+        ROTATE: "rotate",
+        DROP: "drop",
+    }
+    for game in range(n_games):
+        sim = ScriptedSimulation(templates, sequences[game])
+        sim.start_game()
+        lines, cols = np.nonzero(prefill[game])
+        sim.board.add(zip(cols, lines + sim.scene_height - prefilled_lines), "x")
+        for action in actions[:, game]:
+            if sim.is_running:
+                getattr(sim, methods[action])()
+
+        assert sim.is_running == batch.is_running[game]
+        assert sim.completed_lines == batch.completed_lines[game]
+        assert sim.tick_interval == batch.tick_intervals[game]
+        assert (_board_array(sim) == batch.boards[game]).all()
+        if sim.is_running:
+            assert sorted(sim.current.cells()) == sorted(
+                map(tuple, batch.cells(np.array([game]))[0].tolist())
+            )
+    if prefilled_lines:
+        assert batch.completed_lines.sum() > 0
+
+
+def test_custom_board_dimensions(templates):
+    batch = BatchEngine(templates, 2, seed=0, width=8, height=10)
+    batch.start_game()
+
+    batch.step([DROP, DROP])
+
+    assert batch.boards.shape == (2, 10, 8)
+    assert (batch.anchors == (4, 1)).all()
+    assert batch.boards[:, -1].any(axis=1).all()
@@ -0,0 +1,23 @@
+from figgy.utils.benchmark import BENCHMARKS, regressions, run
+
+
+def test_run_benchmarks():
+    results = run(["new_piece", "check_lines_full_bitboard"], repeat=2)
+
+    assert sorted(results) == ["check_lines_full_bitboard", "new_piece"]
+    for result in results.values():
+        assert 0 < result["best"] <= result["median"]
+        assert result["number"] >= 1
+
+
+def test_every_benchmark_returns_a_callable(pygame_setup):
+    for name, setup in BENCHMARKS.items():
+        func = setup()
+        func()
+
+
+def test_regressions():
+    baseline = {"a": {"best": 1.0}, "b": {"best": 1.0}}
+    results = {"a": {"best": 1.1}, "b": {"best": 1.5}, "c": {"best": 9.0}}
+
+    assert regressions(results, baseline) == {"b": 1.5}
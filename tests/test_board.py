@@ -0,0 +1,225 @@
+import random
+
+import pytest
+
+from figgy.board import BitBoard, Board
+from figgy.simulation import Simulation
+
+TEMPLATES = [
+    [{"x": 0, "y": 1}, {"x": 1, "y": 1}, {"x": 0, "y": 0}, {"x": 1, "y": 0}],
+    [{"x": 0, "y": 2}, {"x": 0, "y": 1}, {"x": 0, "y": 0}, {"x": 0, "y": -1}],
+    [{"x": 0, "y": 1}, {"x": -1, "y": 0}, {"x": 0, "y": 0}, {"x": 0, "y": -1}],
+]
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_add_and_get(board_class):
+    board = board_class(3, 3)
+
+    board.add([(0, 0), (2, 1)], "x")
+
+    assert (0, 0) in board
+    assert (1, 0) not in board
+    assert (3, 0) not in board
+    assert board.get((2, 1)) == "x"
+    assert board.get((1, 1)) is None
+    assert len(board) == 2
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_remove_line(board_class):
+    board = board_class(3, 3)
+    board.add([(0, 0), (1, 1), (0, 2), (1, 2), (2, 2)], "x")
+
+    assert board.is_line_full(2)
+    assert not board.is_line_full(1)
+    board.remove_line(2)
+
+    assert sorted(pos for pos, _ in board.items()) == [(0, 1), (1, 2)]
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_row_counts(board_class):
+    board = board_class(3, 3)
+
+    board.add([(0, 2), (1, 2), (1, 1)], "x")
+    board.add([(1, 2)], "y")
+
+    assert [board.row_count(line) for line in range(3)] == [0, 1, 2]
+    board.remove_line(1)
+    assert [board.row_count(line) for line in range(3)] == [0, 0, 2]
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_remove_lines_in_one_pass(board_class):
+    rng = random.Random(3)
+    cells = [(rng.randrange(6), rng.randrange(10)) for _ in range(40)]
+    one_by_one = board_class(6, 10)
+    one_pass = board_class(6, 10)
+    one_by_one.add(cells, "x")
+    one_pass.add(cells, "x")
+
+    for line in (2, 5, 6, 9):
+        one_by_one.remove_line(line)
+    one_pass.remove_lines([9, 2, 6, 5])
+
+    assert sorted(one_by_one.items()) == sorted(one_pass.items())
+    assert [one_pass.row_count(line) for line in range(10)] == [
+        one_by_one.row_count(line) for line in range(10)
+    ]
+
+
+def test_bitboard_row_masks():
+    board = BitBoard(4, 2)
+
+    board.add([(0, 1), (3, 1)], "x")
+
+    assert board.rows == [0, 0b1001]
+    board.add([(1, 1), (2, 1)], "y")
+    assert board.is_line_full(1)
+
+
+def test_random_operations_are_equivalent():
+    rng = random.Random(42)
+    dict_board = Board(12, 25)
+    bit_board = BitBoard(12, 25)
+
+    for _ in range(500):
+        line = rng.randrange(25)
+        if rng.random() < 0.1:
+            dict_board.remove_line(line)
+            bit_board.remove_line(line)
+        else:
+            cells = [(rng.randrange(12), line) for _ in range(4)]
+            image = f"pastel1_{rng.randrange(9)}"
+            dict_board.add(cells, image)
+            bit_board.add(cells, image)
+
+        assert sorted(dict_board.items()) == sorted(bit_board.items())
+        assert len(dict_board) == len(bit_board)
+        assert all(
+            dict_board.is_line_full(line) == bit_board.is_line_full(line)
+            and dict_board.row_count(line) == bit_board.row_count(line)
+            for line in range(25)
+        )
+
+
+def test_games_are_equivalent():
+    results = []
+    for board_class in (Board, BitBoard):
+        rng = random.Random(1)
+        sim = Simulation(TEMPLATES, ["a", "b"], board_class, rng=rng)
+        sim.start_game()
+        while sim.is_running:
+            for _ in range(rng.randrange(6)):
+                sim.move_left()
+            sim.rotate()
+            for _ in range(rng.randrange(6)):
+                sim.move_right()
+            sim.drop()
+        results.append((sorted(sim.board.items()), sim.completed_lines))
+
+    assert results[0] == results[1]
+
+
+def _brute_force_surface(board):
+    heights = [0] * board.width
+    holes = [0] * board.width
+    for col in range(board.width):
+        lines = [line for line in range(board.height) if (col, line) in board]
+        if lines:
+            heights[col] = board.height - lines[0]
+            holes[col] = heights[col] - len(lines)
+    return tuple(heights), tuple(holes)
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_surface_is_maintained_incrementally(board_class):
+    rng = random.Random(7)
+    board = board_class(6, 10)
+    for _ in range(200):
+        if rng.random() < 0.8:
+            board.add([(rng.randrange(6), rng.randrange(3, 10))], "x")
+        else:
+            board.remove_lines(rng.sample(range(10), rng.randrange(1, 4)))
+
+        heights, holes = _brute_force_surface(board)
+        assert board.column_heights() == heights
+        assert board.column_holes() == holes
+        assert board.bumpiness() == sum(
+            abs(a - b) for a, b in zip(heights, heights[1:])
+        )
+
+    restored = board_class(6, 10)
+    restored.restore(board.snapshot())
+    assert restored.column_heights() == board.column_heights()
+    assert restored.column_holes() == board.column_holes()
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_profile_of_candidate_placement(board_class):
+    board = board_class(4, 5)
+    board.add([(0, 4), (1, 4), (1, 3)], "x")
+    candidate = [(2, 4), (3, 4), (2, 2), (3, 2)]
+
+    profile = board.profile(candidate)
+
+    assert profile.heights == (1, 2, 3, 3)
+    assert profile.holes == (0, 0, 1, 1)
+    assert board.column_heights() == (1, 2, 0, 0)
+
+
+def test_zobrist_hash_is_maintained_incrementally():
+    rng = random.Random(11)
+    boards = [Board(6, 10), BitBoard(6, 10)]
+    for _ in range(200):
+        if rng.random() < 0.8:
+            cells = [(rng.randrange(6), rng.randrange(3, 10))]
+            for board in boards:
+                board.add(cells, "x")
+        else:
+            lines = rng.sample(range(10), rng.randrange(1, 4))
+            for board in boards:
+                board.remove_lines(lines)
+
+        fresh = Board(6, 10)
+        fresh.add([pos for pos, _ in boards[0].items()], "y")
+        assert boards[0].zobrist == boards[1].zobrist == fresh.zobrist
+
+    boards[1].remove_line(8)
+    restored = BitBoard(6, 10)
+    restored.restore(boards[1].snapshot())
+    assert restored.zobrist == boards[1].zobrist
+    boards[1].clear()
+    assert boards[1].zobrist == 0
+
+
+def test_bitboard_stores_colour_indices():
+    board = BitBoard(3, 3)
+    board.add([(0, 2), (1, 2)], "red")
+    board.add([(2, 2), (0, 1)], "blue")
+
+    rows, colors, palette, index = board.snapshot()
+    board.remove_line(2)
+    restored = BitBoard(3, 3)
+    restored.restore((rows, colors, palette, index))
+
+    assert len(colors) == 9 * 2  # 16-bit indices
+    assert palette == (None, "red", "blue")
+    assert sorted(board.items()) == [((0, 2), "blue")]
+    assert restored.get((1, 2)) == "red"
+    restored.add([(1, 1)], "green")
+    assert restored.get((1, 1)) == "green"
+
+
+def test_bitboard_holds_more_than_256_images():
+    board = BitBoard(20, 20)
+    for idx in range(300):
+        board.add([(idx % 20, idx // 20)], f"image_{idx}")
+    restored = BitBoard(20, 20)
+    restored.restore(board.snapshot())
+    restored.remove_line(19)
+
+    assert board.get((19, 14)) == "image_299"
+    assert restored.get((19, 15)) == "image_299"
+    assert len(restored) == 300
@@ -0,0 +1,37 @@
+import json
+
+import numpy as np
+import pygame
+
+from figgy.utils import create_img
+
+PASTEL = [(0.984, 0.706, 0.682), (0.702, 0.804, 0.890)]
+
+
+def test_tiles_have_border_ring_and_fill():
+    images = create_img.tiles(PASTEL, size=8)
+
+    assert images.shape == (2, 8, 8, 3)
+    assert images.dtype == np.uint8
+    assert (images[:, 0] == 178).all()
+    assert tuple(images[0, 1, 1]) == (129, 164, 168)
+    assert tuple(images[1, 4, 4]) == (179, 205, 226)
+
+
+def test_generate_images(tmp_path):
+    paths = create_img.generate(PASTEL, "theme", 24, str(tmp_path))
+
+    assert paths == [str(tmp_path / "theme_0.png"), str(tmp_path / "theme_1.png")]
+    loaded = pygame.surfarray.array3d(pygame.image.load(paths[1])).swapaxes(0, 1)
+    assert (loaded == create_img.tiles(PASTEL[1:])[0]).all()
+
+
+def test_generate_atlas_at_another_size(tmp_path):
+    paths = create_img.generate(PASTEL, "theme", 16, str(tmp_path), atlas=True)
+
+    assert paths == [str(tmp_path / "16px" / "theme_atlas.png")]
+    assert pygame.image.load(paths[0]).get_size() == (32, 16)
+    with open(tmp_path / "16px" / "theme_atlas.json") as fileobj:
+        index = json.load(fileobj)
+    assert index["size"] == 16
+    assert index["tiles"]["theme_1"] == [16, 0, 16, 16]
@@ -0,0 +1,212 @@
+import pickle
+import random
+
+import pygame
+import pytest
+from pgzero import game
+
+from figgy.game_logic import Block, Engine
+from figgy.simulation import DROP, MOVE_LEFT, TICK
+
+
+@pytest.fixture
+def engine(pygame_setup, fake_clock):
+    engine = Engine(fake_clock)
+    engine.start_game()
+    return engine
+
+
+def _pixel(grid_pos):
+    half = Block.block_size // 2
+    return game.screen.get_at(
+        (grid_pos[0] * Block.block_size + half, grid_pos[1] * Block.block_size + half)
+    )
+
+
+def test_draw_falling_piece(engine):
+    engine.draw()
+
+    for pos in engine.simulation.current.cells():
+        assert _pixel(pos) != Engine.background
+    assert _pixel((0, 24)) == Engine.background
+
+
+def test_board_layer_is_only_repainted_on_lock(engine, monkeypatch):
+    renders = []
+    original = engine._render_board_layer
+    monkeypatch.setattr(
+        engine, "_render_board_layer", lambda: renders.append(1) or original()
+    )
+
+    engine.draw()
+    engine._tick()
+    engine.draw()
+    assert len(renders) == 1
+
+    cells = engine.simulation.current.cells()
+    engine.drop()
+    engine.draw()
+
+    assert len(renders) == 2
+    fall = Engine.scene_height - 1 - max(line for _, line in cells)
+    for col, line in cells:
+        assert _pixel((col, line + fall)) != Engine.background
+
+
+def test_drop_locks_without_ticks(engine):
+    current = engine.simulation.current
+    landing = current.drop_distance(engine.simulation.board)
+
+    engine.drop()
+
+    assert engine.simulation.pieces_placed == 1
+    assert engine.simulation.current is not current
+    assert current.anchor[1] == 1 + landing
+    assert engine.replay_log.codes == [DROP]
+
+
+def test_ghost_shows_landing_position(pygame_setup, fake_clock):
+    engine = Engine(fake_clock, ghost=True)
+    engine.start_game()
+    current = engine.simulation.current
+
+    engine.draw()
+
+    distance = current.drop_distance(engine.simulation.board)
+    for col, line in current.cells():
+        ghost = _pixel((col, line + distance))
+        assert ghost != Engine.background
+        assert ghost != _pixel((col, line))
+
+
+def test_animated_drop(pygame_setup, fake_clock, monkeypatch):
+    engine = Engine(fake_clock, animate_drop=True)
+    engine.start_game()
+    engine.draw()
+
+    engine.drop()
+    assert engine.simulation.pieces_placed == 1
+    engine.move_left()  # Input is ignored while the object slides down
+    assert engine.replay_log.codes == [DROP]
+    engine.draw()
+    assert engine.draw_dirty() == [game.screen.get_rect()]
+
+    monkeypatch.setattr(Engine, "drop_animation_time", 0.0)
+    engine._animate()
+    engine.move_left()
+    assert engine.replay_log.codes == [DROP, MOVE_LEFT]
+
+
+@pytest.mark.parametrize("ghost", [False, True])
+def test_dirty_rects_match_full_redraw(pygame_setup, fake_clock, ghost):
+    engine = Engine(fake_clock, rng=random.Random(0), ghost=ghost)
+    engine.start_game()
+    board = engine.simulation.board
+    for line in range(14, Engine.scene_height):
+        board.add(
+            [(col, line) for col in range(Engine.scene_width) if col != 6], "pastel1_0"
+        )
+    inputs = [engine._tick, engine.move_left, engine.rotate, engine.move_right]
+    for step in range(300):
+        if not engine.is_running:
+            break
+        inputs[step % len(inputs)]()
+        if step % 7 == 0:
+            engine.drop()
+            for _ in range(step % 3):
+                engine._tick()
+
+        rects = engine.draw_dirty()
+        assert all(game.screen.get_rect().contains(rect) for rect in rects)
+        dirty = pygame.image.tobytes(game.screen, "RGB")
+        engine.draw()
+        assert pygame.image.tobytes(game.screen, "RGB") == dirty
+    assert engine.simulation.completed_lines > 0
+
+
+def test_custom_scene_size(pygame_setup, fake_clock):
+    engine = Engine(fake_clock, width=6, height=10, block_size=12)
+    engine.start_game()
+
+    engine.draw()
+
+    assert engine._board_layer.get_size() == (72, 120)
+    assert engine.simulation.current.anchor == (3, 1)
+    cells = engine.simulation.current.cells()
+    for col in range(6):
+        for line in range(10):
+            # Every pixel of the cell, the tiles must not spill into neighbours
+            pixels = {
+                tuple(game.screen.get_at((col * 12 + x, line * 12 + y)))
+                for x in range(12)
+                for y in range(12)
+            }
+            assert (pixels == {Engine.background + (255,)}) == (
+                (col, line) not in cells
+            )
+
+
+def test_snapshot_and_restore(engine):
+    for _ in range(5):
+        engine.drop()
+    state = engine.snapshot()
+    placed = engine.simulation.pieces_placed
+    engine.draw()
+
+    for _ in range(5):
+        engine.drop()
+    engine.restore(pickle.loads(pickle.dumps(state)))
+    engine.draw()
+
+    assert engine.simulation.pieces_placed == placed
+    assert engine.snapshot() == state
+    for pos, _ in engine.simulation.board.items():
+        assert _pixel(pos) != Engine.background
+    engine.drop()
+    replayed = engine.snapshot()
+    engine.restore(state)
+    engine.drop()
+    assert engine.snapshot() == replayed
+
+
+def test_fixed_step_queues_inputs(pygame_setup, fake_clock):
+    engine = Engine(fake_clock, timestep=0.125)
+    engine.start_game()
+    anchor = engine.simulation.current.anchor
+
+    engine.move_left()
+    assert engine.simulation.current.anchor == anchor
+    assert engine.update(0.125) == 1
+    assert engine.simulation.current.anchor == (anchor[0] - 1, anchor[1])
+
+    for _ in range(9):
+        engine.update(0.125)
+    assert engine.simulation.current.anchor[1] == anchor[1] + 1
+    assert engine.replay_log.codes == [MOVE_LEFT, TICK]
+    assert [time_ms for time_ms, _ in engine.replay_log] == [0, 1250]
+
+
+def test_fixed_step_pause_stops_gravity(pygame_setup, fake_clock):
+    engine = Engine(fake_clock, timestep=0.125)
+    engine.start_game()
+    anchor = engine.simulation.current.anchor
+
+    engine.pause_game()
+    for _ in range(20):
+        engine.update(0.125)
+    engine.drop()
+    engine.update(0.125)
+
+    assert engine.simulation.current.anchor == anchor
+    assert engine.simulation.pieces_placed == 0
+
+
+def test_upcoming_pieces_are_spawned_in_order(pygame_setup, fake_clock):
+    engine = Engine(fake_clock, preview=4)
+    engine.start_game()
+    upcoming = engine.upcoming
+
+    for template, image in upcoming:
+        engine.drop()
+        assert engine.simulation.current.template == template
+        assert engine.simulation.current.image == image
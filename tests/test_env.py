@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from figgy.board import BitBoard, Board
+from figgy.env import FALLING, FIXED, FiggyBatchEnv, FiggyEnv
+from figgy.simulation import DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, TICK
+
+
+def _expected_observation(sim):
+    expected = np.zeros((sim.scene_height, sim.scene_width), dtype=np.uint8)
+    for (col, line), _ in sim.board.items():
+        expected[line, col] = FIXED
+    for col, line in sim.current.cells():
+        expected[line, col] = FALLING
+    return expected
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+def test_observation_is_updated_in_place(board_class):
+    env = FiggyEnv(board_class=board_class, seed=1)
+    obs = env.reset()
+    rng = np.random.default_rng(0)
+    total = 0
+
+    assert obs.shape == (25, 12)
+    assert not obs.flags.writeable
+    assert (obs == FALLING).sum() == 4
+    for action in rng.choice([TICK, TICK, MOVE_LEFT, MOVE_RIGHT, ROTATE, DROP], 500):
+        step_obs, reward, done, info = env.step(action)
+        total += reward
+
+        assert step_obs is obs
+        if done:
+            break
+        assert (obs == _expected_observation(env.simulation)).all()
+    assert total == info["lines"] == env.simulation.completed_lines
+    assert info["pieces"] > 0
+
+
+def test_reset_with_seed_is_reproducible():
+    env = FiggyEnv()
+    first = env.reset(seed=3).copy()
+    env.step(DROP)
+
+    assert (env.reset(seed=3) == first).all()
+
+
+def test_batch_env_restarts_finished_games():
+    env = FiggyBatchEnv(4, seed=0, width=6, height=8)
+    obs = env.reset()
+    ended = np.zeros(4, dtype=bool)
+
+    for _ in range(30):
+        step_obs, rewards, dones = env.step(np.full(4, DROP))
+        ended |= dones
+        assert step_obs is obs
+        assert rewards.shape == (4,)
+        assert ((obs == FALLING).sum(axis=(1, 2)) >= 1).all()
+
+    assert obs.shape == (4, 8, 6)
+    assert ended.all()
+    assert env.engine.is_running.any()
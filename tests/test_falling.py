@@ -1,6 +1,7 @@
 import pytest
 
 from figgy.game_logic import FallingObject, FallFailure, Engine
+from figgy.templates import TemplateSet
 
 
 @pytest.fixture
@@ -151,3 +152,11 @@ def test_rotate_blocked_by_block(new_object):
     for pos1, pos2 in zip(old_pos, new_pos):
         assert pos1[0] == pos2[0]
         assert pos1[1] == pos2[1]
+
+
+def test_templates_can_be_reused(pygame_setup):
+    templates = TemplateSet([[{"x": 0, "y": 0}, {"x": 1, "y": 0}]])
+
+    object_ = FallingObject(templates, ["pastel1_0.png"])
+
+    assert object_.piece.offsets == templates.orientations[0][0]
@@ -0,0 +1,42 @@
+import json
+import random
+
+from figgy.game_logic import Engine
+from figgy.profiling import Profiler, instrument
+
+
+def test_ring_buffer_and_summary():
+    profiler = Profiler(size=3)
+    for seconds in (1.0, 0.001, 0.002, 0.003):
+        profiler.record("section", seconds)
+
+    stats = profiler.summary()["section"]
+
+    assert stats["calls"] == 3
+    assert stats["max_ms"] == 3.0
+    assert abs(stats["mean_ms"] - 2.0) < 1e-9
+    assert profiler.overlay_lines() == ["section: 2.000 ms (max 3.000)"]
+
+
+def test_instrumented_engine(pygame_setup, fake_clock, tmp_path):
+    engine = Engine(fake_clock, rng=random.Random(0))
+    profiler = instrument(engine)
+    engine.start_game()
+
+    for _ in range(3):
+        engine._tick()
+    engine.move_left()
+    engine.drop()
+    engine.draw()
+
+    stats = profiler.summary()
+    assert stats["_tick"]["calls"] == 3
+    assert stats["tick_jitter"]["calls"] == 3
+    for name in ("start_game", "move_left", "drop", "draw", "check_lines"):
+        assert stats[name]["calls"] == 1
+    assert stats["_handle_fall_failure"]["calls"] == 1
+
+    filename = tmp_path / "profile.json"
+    profiler.dump(str(filename))
+    dumped = json.loads(filename.read_text())
+    assert len(dumped["timings"]["_tick"]) == 3
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from figgy import resources
+from figgy.randomizer import BagSource, ReplaySource, UniformSource
+from figgy.simulation import Simulation
+
+IMAGES = ["a", "b", "c"]
+
+
+def test_uniform_source_matches_one_at_a_time_choices():
+    source = UniformSource(7, IMAGES, random.Random(5), chunk_size=4)
+    rng = random.Random(5)
+
+    pieces = [source.pop() for _ in range(10)]
+
+    assert pieces == [(rng.randrange(7), rng.choice(IMAGES)) for _ in range(10)]
+
+
+def test_peek_does_not_change_the_sequence():
+    source = UniformSource(7, IMAGES, random.Random(1), chunk_size=3)
+    reference = UniformSource(7, IMAGES, random.Random(1), chunk_size=3)
+
+    upcoming = source.peek(8)
+
+    assert upcoming == tuple(reference.pop() for _ in range(8))
+    assert source.pop() == upcoming[0]
+
+
+def test_bag_source_deals_every_template_once_per_bag():
+    source = BagSource(7, IMAGES, random.Random(0), chunk_size=10)
+
+    templates = [source.pop()[0] for _ in range(70)]
+
+    for start in range(0, 70, 7):
+        assert sorted(templates[start : start + 7]) == list(range(7))
+
+
+def test_state_and_reset():
+    source = BagSource(7, IMAGES, chunk_size=5)
+    source.reset(3)
+    source.pop()
+    state = source.getstate()
+    expected = [source.pop() for _ in range(12)]
+
+    source.setstate(state)
+    assert [source.pop() for _ in range(12)] == expected
+    source.reset(3)
+    first = source.pop()
+    source.reset(3)
+    assert source.pop() == first
+
+
+def test_replay_source_repeats_a_recording():
+    recorded = ReplaySource.record(BagSource(7, IMAGES), 9, seed=2)
+    again = BagSource(7, IMAGES)
+    again.reset(2)
+
+    assert recorded.peek(9) == tuple(again.pop() for _ in range(9))
+    assert recorded.peek(11)[9:] == recorded.pieces[:2]
+    recorded.pop()
+    recorded.reset()
+    assert recorded.pop() == recorded.pieces[0]
+
+
+def test_simulation_previews_the_source():
+    templates = resources.load_templates()
+    source = BagSource(len(templates), resources.image_names())
+    sim = Simulation(templates, resources.image_names(), source=source, preview=3)
+    sim.start_game(seed=4)
+
+    upcoming = sim.upcoming
+    assert len(upcoming) == 3
+    assert sim.next_piece == upcoming[0]
+    sim.drop()
+    assert sim.current.template == upcoming[0][0]
+    assert sim.upcoming[:2] == upcoming[1:]
+
+
+def test_replay_source_needs_pieces():
+    with pytest.raises(ValueError):
+        ReplaySource([])
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from figgy.game_logic import Engine
+from figgy.replay import PAUSE, ReplayEngine, ReplayLog
+from figgy.simulation import TICK, ROTATE
+
+
+@pytest.fixture
+def recorded_engine(fake_clock):
+    rng = random.Random(5)
+    engine = Engine(fake_clock, rng=rng)
+    engine.start_game()
+    inputs = [engine.move_left, engine.move_right, engine.rotate, engine._tick]
+    while engine.is_running:
+        for _ in range(rng.randrange(8)):
+            rng.choice(inputs)()
+        for _ in range(rng.randrange(24)):
+            engine._tick()
+        engine.drop()
+    return engine
+
+
+def test_log_to_bytes_and_back():
+    log = ReplayLog(123)
+    log.record(TICK, 0)
+    log.record(ROTATE, 1250)
+
+    data = log.to_bytes()
+    loaded = ReplayLog.from_bytes(data)
+
+    assert len(data) == 18 + 2 * 8
+    assert loaded.seed == 123
+    assert (loaded.width, loaded.height) == (12, 25)
+    assert list(loaded) == [(0, TICK), (1250, ROTATE)]
+
+
+def test_log_of_a_long_game():
+    week_ms = 7 * 24 * 3600 * 1000
+    log = ReplayLog(1)
+    log.record(TICK, 2 ** 29)
+    log.record(PAUSE, week_ms)
+
+    assert list(ReplayLog.from_bytes(log.to_bytes())) == [
+        (2 ** 29, TICK),
+        (week_ms, PAUSE),
+    ]
+    with pytest.raises(ValueError):
+        log.record(TICK, -1)
+
+
+def test_not_a_log():
+    with pytest.raises(ValueError):
+        ReplayLog.from_bytes(b"PNG\x00" + bytes(10))
+
+
+def test_replay_reproduces_game(recorded_engine, tmp_path):
+    filename = str(tmp_path / "game.bin")
+    recorded_engine.replay_log.save(filename)
+
+    sim = ReplayEngine(ReplayLog.load(filename)).run()
+
+    assert not sim.is_running
+    assert sim.pieces_placed == recorded_engine.simulation.pieces_placed
+    assert sim.snapshot() == recorded_engine.simulation.snapshot()
+
+
+def test_replay_of_custom_board_size(pygame_setup, fake_clock):
+    rng = random.Random(1)
+    engine = Engine(fake_clock, rng=rng, width=6, height=10)
+    engine.start_game()
+    while engine.is_running:
+        for _ in range(rng.randrange(4)):
+            rng.choice([engine.move_left, engine.move_right, engine.rotate])()
+        engine.drop()
+
+    log = ReplayLog.from_bytes(engine.replay_log.to_bytes())
+    sim = ReplayEngine(log).run()
+
+    assert (sim.scene_width, sim.scene_height) == (6, 10)
+    assert sim.snapshot() == engine.simulation.snapshot()
+
+
+def test_seek_matches_plain_replay(recorded_engine):
+    log = recorded_engine.replay_log
+    replay = ReplayEngine(log, snapshot_interval=50)
+    replay.run()
+    last_tick = replay.tick
+
+    for tick in (last_tick // 2, 10, last_tick - 1, 3 * last_tick // 4, last_tick // 2):
+        expected = ReplayEngine(log).seek(tick).snapshot()
+        assert replay.seek(tick).snapshot() == expected
+        assert replay.tick == tick
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import figgy
+
+
+def test_launch_exits_after_frames():
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(figgy.__file__)))
+    env = dict(
+        os.environ,
+        PYTHONPATH=package_root,
+        SDL_VIDEODRIVER="dummy",
+        SDL_AUDIODRIVER="dummy",
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-m", "figgy.utils.runner", "--frames", "3"],
+        env=env,
+        stdout=subprocess.PIPE,
+        timeout=30,
+        check=True,
+    )
+
+    assert b"3 frames drawn" in result.stdout
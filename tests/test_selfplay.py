@@ -0,0 +1,22 @@
+from figgy.utils.selfplay import play_game, run
+
+
+def test_game_is_reproducible_from_seed():
+    first = play_game(7)
+    second = play_game(7)
+
+    assert first["pieces"] > 0
+    assert (first["lines"], first["pieces"]) == (second["lines"], second["pieces"])
+
+
+def test_max_pieces():
+    stats = play_game(3, max_pieces=5)
+
+    assert stats["pieces"] <= 5
+
+
+def test_run_on_process_pool():
+    stats = run(4, seed=10, workers=2)
+
+    assert [game["seed"] for game in stats] == [10, 11, 12, 13]
+    assert stats[1]["pieces"] == play_game(11)["pieces"]
@@ -0,0 +1,177 @@
+import asyncio
+import random
+
+import pytest
+
+from figgy import resources
+from figgy.randomizer import ReplaySource
+from figgy.server import Client, GameServer, Session
+from figgy.simulation import DROP, MOVE_LEFT, ROTATE, Simulation
+from figgy.utils import serverbench
+
+
+def _session(seed=0):
+    sim = Simulation(
+        resources.load_templates(), resources.image_names(), rng=random.Random()
+    )
+    session = Session(1, sim, 1.0 / 60)
+    session.start(seed)
+    return session
+
+
+def test_deltas_rebuild_the_board():
+    session = _session()
+    client = Client()
+    client.apply(session.state())
+    rng = random.Random(0)
+
+    while session.sim.is_running:
+        session.stepper.push(rng.choice([MOVE_LEFT, ROTATE, DROP, DROP]))
+        session.stepper.step()
+        message = session.delta()
+        if message is not None:
+            client.apply(message)
+        assert client.board == dict(session.sim.board.items())
+        assert client.cells() == session.sim.current.cells()
+
+    assert client.over
+    assert client.lines == session.sim.completed_lines
+
+
+@pytest.mark.parametrize("steps_per_delta", [1, 3])
+def test_deltas_with_cleared_lines(steps_per_delta):
+    square = [{"x": 0, "y": 1}, {"x": 1, "y": 1}, {"x": 0, "y": 0}, {"x": 1, "y": 0}]
+    sim = Simulation([square], ["a"], width=4, height=8, rng=random.Random())
+    session = Session(1, sim, 1.0 / 60)
+    session.start()
+    client = Client(sim.object_templates)
+    client.apply(session.state())
+    inputs = [DROP, MOVE_LEFT, MOVE_LEFT, DROP, DROP, MOVE_LEFT, MOVE_LEFT, DROP, DROP]
+
+    for step, code in enumerate(inputs, 1):
+        session.stepper.push(code)
+        session.stepper.step()
+        if step % steps_per_delta == 0 or step == len(inputs):
+            message = session.delta()
+            if message is not None:
+                client.apply(message)
+            assert client.board == dict(sim.board.items())
+
+    assert sim.completed_lines == 4
+    assert len(client.board) == 4
+
+
+def test_delta_is_only_sent_on_changes():
+    session = _session()
+    session.state()
+
+    assert session.delta() is None
+    session.stepper.push(DROP)
+    session.stepper.step()
+    message = session.delta()
+
+    assert {"type", "tick", "cells"} <= set(message)
+    assert "cleared" not in message
+    assert len(message["cells"]) == 4
+
+
+def test_player_and_spectator_over_localhost():
+    async def play():
+        server = GameServer(timestep=0.005)
+        await server.start()
+        player, spectator = Client(), Client()
+        await player.join("127.0.0.1", server.port, seed=3)
+        await spectator.watch("127.0.0.1", server.port, player.session)
+
+        await player.send(DROP)
+        while not player.board or not spectator.board:
+            for client in (player, spectator):
+                if not client.board:
+                    await client.receive()
+        await player.close()
+        await spectator.close()
+        await server.close()
+        return server, player, spectator
+
+    server, player, spectator = asyncio.run(play())
+
+    assert len(player.board) == 4
+    assert spectator.board == player.board
+    assert server.profiler.summary()["tick_latency"]["calls"] > 0
+
+
+def test_load_test_reports_latency():
+    stats = serverbench.benchmark(n_sessions=5, duration=0.3, timestep=0.01)
+
+    assert stats["steps"] > 0
+    assert stats["sessions_per_core"] > 0
+    assert stats["latency_p99_ms"] < 1000
+
+
+def test_slow_player_ends_the_session():
+    async def play():
+        server = GameServer(timestep=0.005, max_buffer=-1)
+        await server.start()
+        player = Client()
+        await player.join("127.0.0.1", server.port)
+        while await player.receive() is not None:
+            pass
+        sessions = dict(server.sessions)
+        await server.close()
+        return sessions
+
+    assert asyncio.run(play()) == {}
+
+
+def test_message_that_is_not_an_object_drops_the_client():
+    async def play():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context)
+        )
+        server = GameServer(timestep=0.005)
+        await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b'{"type": "join"}\n5\n')
+        while await reader.readline():
+            pass
+        writer.close()
+        sessions = dict(server.sessions)
+        await server.close()
+        return errors, sessions
+
+    errors, sessions = asyncio.run(play())
+
+    assert errors == []
+    assert sessions == {}
+
+
+def test_spectator_input_is_dropped():
+    async def play():
+        server = GameServer(timestep=0.005)
+        await server.start()
+        player, spectator = Client(), Client()
+        await player.join("127.0.0.1", server.port, seed=3)
+        await spectator.watch("127.0.0.1", server.port, player.session)
+        spectator._writer.write(bytes(1 << 20))
+        await spectator._writer.drain()
+
+        await player.send(DROP)
+        while not spectator.board:
+            await spectator.receive()
+        await player.close()
+        await spectator.close()
+        await server.close()
+        return spectator
+
+    assert len(asyncio.run(play()).board) == 4
+
+
+def test_sessions_with_a_replay_source():
+    pieces = [(0, "pastel1_0"), (1, "pastel1_1")]
+    server = GameServer(source_factory=lambda: ReplaySource(pieces))
+
+    first, second = server.new_session(), server.new_session()
+
+    assert first.sim.next_piece == second.sim.next_piece == pieces[1]
+    assert first.sim.current.template == pieces[0][0]
@@ -0,0 +1,162 @@
+import random
+
+import pytest
+
+from figgy.board import Board
+from figgy.simulation import DROP, MOVE_LEFT, FallFailure, Piece, Simulation
+from figgy.templates import TemplateSet
+
+SQUARE = [{"x": 0, "y": 1}, {"x": 1, "y": 1}, {"x": 0, "y": 0}, {"x": 1, "y": 0}]
+I_SHAPE = [{"x": 0, "y": 2}, {"x": 0, "y": 1}, {"x": 0, "y": 0}, {"x": 0, "y": -1}]
+
+
+@pytest.fixture
+def new_simulation():
+    def wrapper(template=None):
+        sim = Simulation([template or SQUARE], ["pastel1_0"])
+        sim.start_game()
+        return sim
+
+    return wrapper
+
+
+def test_piece_spawn_position():
+    piece = Piece(TemplateSet([SQUARE]), 0, "pastel1_0", 12, 25)
+
+    assert piece.cells() == [(6, 2), (7, 2), (6, 1), (7, 1)]
+
+
+def test_piece_rotate_keeps_anchor():
+    piece = Piece(TemplateSet([I_SHAPE]), 0, "pastel1_0", 12, 25)
+    piece.move_down({})
+    piece.move_down({})
+
+    assert piece.rotate({})
+
+    assert piece.cells() == [(4, 3), (5, 3), (6, 3), (7, 3)]
+
+
+def test_tick_moves_piece_down(new_simulation):
+    sim = new_simulation()
+    old_cells = sim.current.cells()
+
+    locked = sim.tick()
+
+    assert not locked
+    assert sim.current.cells() == [(col, line + 1) for col, line in old_cells]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_drop_distance_matches_falling(seed):
+    rng = random.Random(seed)
+    board = Board(12, 25)
+    for line in range(8, 25):
+        board.add([(col, line) for col in range(12) if rng.random() < 0.4], "x")
+    piece = Piece(TemplateSet([SQUARE, I_SHAPE]), seed % 2, "pastel1_0", 12, 25)
+    piece.rotation = seed % 4
+
+    distance = piece.drop_distance(board)
+
+    for _ in range(distance):
+        piece.move_down(board)
+    with pytest.raises(FallFailure):
+        piece.move_down(board)
+
+
+def test_drop_locks_piece_on_board(new_simulation):
+    sim = new_simulation()
+
+    sim.drop()
+
+    assert len(sim.board) == 4
+    assert (6, 24) in sim.board
+    assert sim.board.get((7, 23)) == "pastel1_0"
+    assert sim.current.cells() == [(6, 2), (7, 2), (6, 1), (7, 1)]
+
+
+def test_complete_line_is_removed(new_simulation):
+    sim = new_simulation()
+    sim.board.add([(col, 24) for col in range(12) if col not in (6, 7)], "x")
+    sim.board.add([(0, 23)], "x")
+
+    sim.drop()
+
+    assert sim.completed_lines == 1
+    assert sorted(pos for pos, _ in sim.board.items()) == [(0, 24), (6, 24), (7, 24)]
+
+
+def test_game_over_when_piece_cannot_fall(new_simulation):
+    sim = new_simulation()
+    sim.board.add([(6, 3), (7, 3)], "x")
+
+    sim.tick()
+
+    assert not sim.is_running
+
+
+def test_headless_game_runs_to_the_end(new_simulation):
+    sim = new_simulation(I_SHAPE)
+
+    while sim.is_running:
+        sim.drop()
+
+    assert len(sim.board) > 0
+
+
+def test_board_dimensions_per_simulation():
+    small = Simulation([SQUARE], ["pastel1_0"], width=6, height=10)
+    large = Simulation([SQUARE], ["pastel1_0"], width=20, height=40)
+    small.start_game()
+    large.start_game()
+
+    small.drop()
+    large.drop()
+
+    assert small.current.cells()[2] == (3, 1)
+    assert sorted(pos for pos, _ in small.board.items())[-1] == (4, 9)
+    assert sorted(pos for pos, _ in large.board.items())[-1] == (11, 39)
+    assert Simulation.scene_width == 12
+
+
+def test_state_hash(new_simulation):
+    sim = new_simulation(I_SHAPE)
+    start = sim.state_hash()
+
+    sim.tick()
+    moved = sim.state_hash()
+    sim.drop()
+
+    assert len({start, moved, sim.state_hash()}) == 3
+    assert new_simulation(I_SHAPE).state_hash() == start
+
+
+def test_piece_has_no_instance_dict():
+    piece = Piece(TemplateSet([SQUARE]), 0, "pastel1_0", 12, 25)
+
+    assert not hasattr(piece, "__dict__")
+
+
+def test_restore_keeps_the_global_random_state(new_simulation):
+    sim = new_simulation()
+    state = sim.snapshot()
+    random.seed(5)
+    expected = [random.random() for _ in range(3)]
+
+    random.seed(5)
+    sim.restore(state)
+
+    assert [random.random() for _ in range(3)] == expected
+
+
+def test_apply_action_codes(new_simulation):
+    sim = new_simulation()
+    expected = new_simulation()
+    expected.move_left()
+    expected.drop()
+
+    sim.apply(MOVE_LEFT)
+    sim.apply(DROP)
+
+    assert sim.snapshot().board == expected.snapshot().board
+    with pytest.raises(ValueError):
+        sim.apply(5)
@@ -0,0 +1,47 @@
+import pygame
+import pytest
+
+from figgy import resources
+from figgy.sprites import ImageAtlas, TileRenderer, load_image
+
+
+@pytest.fixture
+def names(pygame_setup):
+    return resources.image_names()
+
+
+def test_image_is_loaded_once(names):
+    assert load_image(names[0]) is load_image(names[0])
+
+
+def test_atlas_areas(names):
+    atlas = ImageAtlas(names)
+
+    areas = [atlas.area(name) for name in names]
+
+    assert atlas.surface.get_width() == sum(area.width for area in areas)
+    assert areas[1].left == areas[0].right
+
+
+@pytest.mark.parametrize("atlas", [False, True])
+def test_renderer_draws_tile(names, atlas):
+    renderer = TileRenderer(24, names, atlas)
+    surface = pygame.Surface((72, 72), pygame.SRCALPHA)
+
+    renderer.draw(surface, names[2], (1, 2))
+
+    tile = load_image(names[2])
+    assert surface.get_at((24 + 12, 48 + 12)) == tile.get_at((12, 12))
+    assert surface.get_at((12, 12)) == (0, 0, 0, 0)
+
+
+@pytest.mark.parametrize("atlas", [False, True])
+def test_renderer_scales_tiles(names, atlas):
+    renderer = TileRenderer(12, names, atlas)
+    surface = pygame.Surface((36, 36), pygame.SRCALPHA)
+
+    renderer.draw(surface, names[2], (1, 1))
+
+    assert surface.get_at((12 + 6, 12 + 6)) != (0, 0, 0, 0)
+    assert surface.get_at((24, 18)) == (0, 0, 0, 0)
+    assert surface.get_at((18, 24)) == (0, 0, 0, 0)
@@ -0,0 +1,82 @@
+import random
+
+from figgy import resources
+from figgy.simulation import DROP, MOVE_LEFT, ROTATE, TICK, Simulation
+from figgy.stepper import FixedStepper
+
+
+def _simulation(seed=0):
+    sim = Simulation(
+        resources.load_templates(), resources.image_names(), rng=random.Random(seed)
+    )
+    sim.start_game()
+    return sim
+
+
+def test_gravity_ticks_on_accumulated_time():
+    applied = []
+    stepper = FixedStepper(applied.append, lambda: 0.5, timestep=0.125)
+
+    assert stepper.advance(0.375) == 3
+    assert applied == []
+    assert stepper.advance(0.0625) == 0
+    assert stepper.advance(0.0625) == 1
+    assert applied == [TICK]
+    assert stepper.time == 0.5
+
+
+def test_inputs_are_applied_at_the_next_step():
+    applied = []
+    stepper = FixedStepper(applied.append, lambda: 0.25, timestep=0.125)
+    stepper.push(MOVE_LEFT)
+    stepper.push(ROTATE)
+
+    assert applied == []
+    assert stepper.pending == 2
+    stepper.advance(0.25)
+
+    assert applied == [MOVE_LEFT, ROTATE, TICK]
+    assert stepper.pending == 0
+
+
+def test_paused_stepper_applies_inputs_without_gravity():
+    applied = []
+    stepper = FixedStepper(applied.append, lambda: 0.125, timestep=0.125)
+    stepper.paused = True
+    stepper.push(DROP)
+
+    stepper.advance(1.0)
+
+    assert applied == [DROP]
+    assert stepper.steps == 8
+
+
+def test_max_delay_caps_a_stalled_frame():
+    stepper = FixedStepper(lambda code: None, lambda: 1.0, 0.125, max_delay=0.25)
+
+    assert stepper.advance(10.0) == 2
+
+
+def test_logic_does_not_depend_on_frame_rate():
+    inputs = [MOVE_LEFT, ROTATE, DROP, MOVE_LEFT, MOVE_LEFT, DROP]
+    states = []
+    for frame_time in (1.0 / 32, 1.0 / 64, 0.25):
+        sim = _simulation()
+        stepper = FixedStepper.for_simulation(sim, timestep=1.0 / 64)
+        for code in inputs:
+            stepper.push(code)
+            for _ in range(int(0.5 / frame_time)):
+                stepper.advance(frame_time)
+        states.append(sim.snapshot())
+
+    assert states[0] == states[1] == states[2]
+
+
+def test_headless_game_runs_faster_than_real_time():
+    sim = _simulation()
+    stepper = FixedStepper.for_simulation(sim)
+
+    stepper.advance(24 * 3600.0)
+
+    assert not sim.is_running
+    assert sim.pieces_placed > 0
@@ -0,0 +1,40 @@
+import os
+
+import figgy
+from figgy.templates import TemplateSet
+
+SQUARE = [{"x": 0, "y": 1}, {"x": 1, "y": 1}, {"x": 0, "y": 0}, {"x": 1, "y": 0}]
+L_SHAPE = [{"x": 0, "y": 1}, {"x": 0, "y": 0}, {"x": 0, "y": -1}, {"x": 1, "y": -1}]
+
+
+def test_orientations_are_quarter_turns():
+    templates = TemplateSet([L_SHAPE])
+
+    orientations = templates.orientations[0]
+
+    assert len(orientations) == 4
+    assert orientations[0] == ((0, 1), (0, 0), (0, -1), (1, -1))
+    assert orientations[1] == ((-1, 0), (0, 0), (1, 0), (1, 1))
+    for current, following in zip(orientations, orientations[1:] + orientations[:1]):
+        assert following == tuple((-y, x) for x, y in current)
+
+
+def test_symmetric_template_is_not_rotated():
+    templates = TemplateSet([SQUARE, L_SHAPE])
+
+    assert templates.symmetric == [True, False]
+    assert len(set(templates.orientations[0])) == 1
+
+
+def test_load_from_file():
+    filename = os.path.join(os.path.dirname(figgy.__file__), "templates.json")
+
+    templates = TemplateSet.from_file(filename)
+
+    assert len(templates) == 7
+    assert all(
+        isinstance(x, int) and isinstance(y, int)
+        for orientations in templates.orientations
+        for offsets in orientations
+        for x, y in offsets
+    )